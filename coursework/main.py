@@ -1,15 +1,11 @@
-import random
-from functools import partial
-from typing import Union, Any
+from typing import Union, Any, cast
 
 from workshop import (CarUnit, CarUnitFactoryNode, CarUnitModelMetrics, RepairQueueingNode, AfterControlTransitionNode,
                       WorkshopCLILogger)
 
-from qnet.common import PriorityQueue, Queue
-from qnet.dist import erlang
-from qnet.node import NodeMetrics
-from qnet.model import Evaluation, Model, Nodes, Verbosity
-from qnet.queueing import Task, ChannelPool, QueueingNode, QueueingMetrics
+from qnet.model import Model, Verbosity
+from qnet.experiment import gather_metrics, sample_metrics
+from qnet.spec import DistSpec, InitialSpec, ModelBuilder, ModelSpec, NodeSpec, QueueSpec, RouteSpec
 
 Metrics = dict[str, Any]
 
@@ -34,63 +30,96 @@ def _second_to_dict(self: CarUnit) -> str:
     return item_dict
 
 
-def get_simulation_model(factory_delay_mean: float = 10.25,
-                         first_repair_priority: bool = True,
-                         repair_delay_mean: float = 22.0,
-                         repair_delay_var: float = 242.0,
-                         repair_max_channels: int = 3,
-                         control_delay: float = 6.0,
-                         control_max_channels: int = 1,
-                         revision_proba=0.15) -> Model[CarUnit, CarUnitModelMetrics]:
+def mean_units_in_system(model: Model) -> float:
+    repair, control = model.nodes['2_repair_shop'].metrics, model.nodes['3_control_shop'].metrics
+    return repair.mean_queuelen + repair.mean_channels_load + control.mean_queuelen + control.mean_channels_load
+
+
+NODE_TYPES = {
+    'car_unit_factory': CarUnitFactoryNode,
+    'repair_queueing': RepairQueueingNode,
+    'after_control_transition': AfterControlTransitionNode,
+}
+
+FUNCTIONS = {
+    'first_repair_priority': _first_repair_priority_fn,
+    'second_repair_priority': _second_repair_priority_fn,
+    'mean_units_in_system': mean_units_in_system,
+}
+
+BUILDER = ModelBuilder[CarUnit](node_types=NODE_TYPES,
+                                metrics_types={'car_unit_model': CarUnitModelMetrics},
+                                functions=FUNCTIONS,
+                                logger_type=WorkshopCLILogger)
+
+
+def get_simulation_spec(factory_delay_mean: float = 10.25,
+                        first_repair_priority: bool = True,
+                        repair_delay_mean: float = 22.0,
+                        repair_delay_var: float = 242.0,
+                        repair_max_channels: int = 3,
+                        control_delay: float = 6.0,
+                        control_max_channels: int = 1,
+                        revision_proba=0.15) -> ModelSpec:
     # Dispatch simulation parameters
     if first_repair_priority:
-        repair_queue = PriorityQueue[CarUnit](priority_fn=_first_repair_priority_fn, fifo=True)
-        to_dict = _first_to_dict
+        repair_queue = QueueSpec(kind='priority', priority='first_repair_priority', fifo=True)
     else:
-        repair_queue = PriorityQueue[CarUnit](priority_fn=_second_repair_priority_fn)
-        to_dict = _second_to_dict
-    setattr(CarUnit, 'to_dict', to_dict)
+        repair_queue = QueueSpec(kind='priority', priority='second_repair_priority')
 
     repair_delay_lambd = repair_delay_mean / repair_delay_var
     repair_delay_k = int(repair_delay_lambd * repair_delay_mean)
 
     # Model nodes and transitions
-    car_units = CarUnitFactoryNode[NodeMetrics](name='1_car_unit_factory',
-                                                metrics=NodeMetrics(),
-                                                delay_fn=partial(random.expovariate, lambd=1.0 / factory_delay_mean))
-    repair = RepairQueueingNode[QueueingMetrics](name='2_repair_shop',
-                                                 queue=repair_queue,
-                                                 metrics=QueueingMetrics(),
-                                                 channel_pool=ChannelPool(repair_max_channels),
-                                                 delay_fn=partial(erlang, lambd=repair_delay_lambd, k=repair_delay_k))
-    control = QueueingNode[CarUnit, QueueingMetrics](name='3_control_shop',
-                                                     queue=Queue(),
-                                                     metrics=QueueingMetrics(),
-                                                     channel_pool=ChannelPool(control_max_channels),
-                                                     delay_fn=lambda: control_delay)
-    after_control = AfterControlTransitionNode[NodeMetrics](name='4_repair_shop_vs_release', metrics=NodeMetrics())
-
-    # Connections
-    car_units.set_next_node(repair)
-    repair.set_next_node(control)
-    control.set_next_node(after_control)
-    after_control.add_next_node(repair, proba=revision_proba)
-    after_control.add_next_node(None, proba=after_control.rest_proba)
+    nodes = (
+        NodeSpec(name='1_car_unit_factory',
+                 type='car_unit_factory',
+                 delay=DistSpec('exponential', {'lambd': 1.0 / factory_delay_mean}),
+                 next_node='2_repair_shop',
+                 next_time=0),
+        NodeSpec(name='2_repair_shop',
+                 type='repair_queueing',
+                 delay=DistSpec('erlang', {
+                     'lambd': repair_delay_lambd,
+                     'k': repair_delay_k
+                 }),
+                 queue=repair_queue,
+                 channels=repair_max_channels,
+                 next_node='3_control_shop'),
+        NodeSpec(name='3_control_shop',
+                 type='queueing',
+                 delay=DistSpec('constant', {'value': control_delay}),
+                 channels=control_max_channels,
+                 next_node='4_repair_shop_vs_release'),
+        NodeSpec(name='4_repair_shop_vs_release',
+                 type='after_control_transition',
+                 routes=(RouteSpec('2_repair_shop', revision_proba), RouteSpec(None))),
+    )
 
     # Initial condition
-    # repair.add_task(Task(CarUnit(id=car_units.next_id, created_time=0), next_time=1.0))
-    repair.add_task(Task(CarUnit(id=car_units.next_id, created_time=0), next_time=1.5))
-    car_units.next_time = 0
+    initial = (InitialSpec(node='2_repair_shop', source='1_car_unit_factory', next_time=1.5), )
 
-    def mean_units_in_system(_: Model) -> float:
-        return (repair.metrics.mean_queuelen + repair.metrics.mean_channels_load + control.metrics.mean_queuelen +
-                control.metrics.mean_channels_load)
+    return ModelSpec(nodes=nodes, metrics='car_unit_model', evaluations=('mean_units_in_system', ), initial=initial)
 
-    model = Model(nodes=Nodes[CarUnit].from_node_tree_root(car_units),
-                  metrics=CarUnitModelMetrics(),
-                  logger=WorkshopCLILogger(),
-                  evaluations=[Evaluation[float](name='mean_units_in_system', evaluate=mean_units_in_system)])
-    return model
+
+def get_simulation_model(factory_delay_mean: float = 10.25,
+                         first_repair_priority: bool = True,
+                         repair_delay_mean: float = 22.0,
+                         repair_delay_var: float = 242.0,
+                         repair_max_channels: int = 3,
+                         control_delay: float = 6.0,
+                         control_max_channels: int = 1,
+                         revision_proba=0.15) -> Model[CarUnit, CarUnitModelMetrics]:
+    setattr(CarUnit, 'to_dict', _first_to_dict if first_repair_priority else _second_to_dict)
+    spec = get_simulation_spec(factory_delay_mean=factory_delay_mean,
+                               first_repair_priority=first_repair_priority,
+                               repair_delay_mean=repair_delay_mean,
+                               repair_delay_var=repair_delay_var,
+                               repair_max_channels=repair_max_channels,
+                               control_delay=control_delay,
+                               control_max_channels=control_max_channels,
+                               revision_proba=revision_proba)
+    return cast(Model[CarUnit, CarUnitModelMetrics], BUILDER.build(spec))
 
 
 def collect_metrics_over_simulation(model: Union[bytes, Model[CarUnit, CarUnitModelMetrics]], start_time: float,
@@ -98,23 +127,7 @@ def collect_metrics_over_simulation(model: Union[bytes, Model[CarUnit, CarUnitMo
     if isinstance(model, bytes):
         model = Model[CarUnit, CarUnitModelMetrics].loads(model)
 
-    while model.step(start_time):
-        pass
-    model.reset_metrics()
-
-    num_steps = (end_time - start_time) // collect_step_time
-    metrics: list[Metrics] = [None] * num_steps
-    next_time, step = start_time + collect_step_time, 0
-    while True:
-        if model.next_time < next_time:
-            if not model.step(end_time):
-                break
-        else:
-            model.goto(next_time, end_time)
-            metrics[step] = gather_metrics_from_model(model)
-            step += 1
-            next_time += collect_step_time
-    return metrics
+    return list(sample_metrics(model, start_time, end_time, collect_step_time))
 
 
 def run_simulation(model: Union[bytes, Model[CarUnit, CarUnitModelMetrics]], simulation_time: float) -> Metrics:
@@ -126,19 +139,7 @@ def run_simulation(model: Union[bytes, Model[CarUnit, CarUnitModelMetrics]], sim
 
 
 def gather_metrics_from_model(model: Model[CarUnit, CarUnitModelMetrics]) -> Metrics:
-    metrics: Metrics = {}
-
-    for name, value in model.model_metrics.to_dict().items():
-        metrics[f'model__{name}'] = value
-
-    for report in model.evaluation_reports:
-        metrics[f'evaluation__{report.name}'] = report.result
-
-    for node_metrics in model.nodes_metrics:
-        for name, value in node_metrics.to_dict().items():
-            metrics[f'{node_metrics.node_name}__{name}'] = value
-
-    return metrics
+    return gather_metrics(model)
 
 
 if __name__ == '__main__':
@@ -1,25 +1,33 @@
-import statistics
-from dataclasses import dataclass
-from typing import Iterable, Any
-
-import numpy as np
-import numpy.typing as npt
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Any
 
 from qnet.model import ModelMetrics
+from qnet.stats import mean_from_sums, std_from_sums
+from qnet.sketch import QuantileSketch
 
 from .common import CarUnit
 
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+
 EPS = 1e-6
 
 
 @dataclass(eq=False)
 class Histogram:
-    values: npt.NDArray[np.float32]
-    bin_edges: npt.NDArray[np.float32]
+    values: 'npt.NDArray[np.float32]'
+    bin_edges: 'npt.NDArray[np.float32]'
 
 
 @dataclass(eq=False)
 class CarUnitModelMetrics(ModelMetrics[CarUnit]):
+    repair_wait_time_sum: float = field(init=False, default=0)
+    repair_wait_time_sq_sum: float = field(init=False, default=0)
+    num_repairs_sum: int = field(init=False, default=0)
+    num_repairs_sq_sum: int = field(init=False, default=0)
+    repair_wait_time_sketch: QuantileSketch = field(init=False, default_factory=QuantileSketch)
+    num_repairs_counts: dict[int, int] = field(init=False, default_factory=dict)
 
     @property
     def repair_wait_times(self) -> Iterable[CarUnit]:
@@ -27,29 +35,25 @@ class CarUnitModelMetrics(ModelMetrics[CarUnit]):
 
     @property
     def repair_wait_time_mean(self) -> float:
-        try:
-            return statistics.mean(self.repair_wait_times)
-        except statistics.StatisticsError:
-            return 0
+        return mean_from_sums(self.num_processed, self.repair_wait_time_sum)
 
     @property
     def repair_wait_time_std(self) -> float:
-        try:
-            return statistics.stdev(self.repair_wait_times)
-        except statistics.StatisticsError:
-            return 0
+        return std_from_sums(self.num_processed, self.repair_wait_time_sum, self.repair_wait_time_sq_sum)
 
     @property
     def repair_wait_time_histogram(self) -> Histogram:
-        times = np.asarray(list(self.repair_wait_times))
-        if times.size > 0:
+        import numpy as np  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        sketch = self.repair_wait_time_sketch
+        if sketch.count > 0:
             num_bins = 15
             bins = np.empty(num_bins)
-            bins[-1] = times.max()
-            bins[:-1] = np.linspace(0, times.mean() + times.std(), num_bins - 1)
+            bins[-1] = sketch.max
+            population_std = self.repair_wait_time_std * ((sketch.count - 1) / sketch.count)**0.5
+            bins[:-1] = np.linspace(0, self.repair_wait_time_mean + population_std, num_bins - 1)
         else:
-            bins = 1
-        return Histogram(*np.histogram(times, bins=bins))
+            bins = np.linspace(0, 1, 2)
+        return Histogram(values=np.asarray(sketch.histogram(bins)), bin_edges=bins)
 
     @property
     def num_repairs(self) -> Iterable[CarUnit]:
@@ -57,26 +61,33 @@ class CarUnitModelMetrics(ModelMetrics[CarUnit]):
 
     @property
     def num_repairs_mean(self) -> float:
-        try:
-            return statistics.mean(self.num_repairs)
-        except statistics.StatisticsError:
-            return 0
+        return mean_from_sums(self.num_processed, self.num_repairs_sum)
 
     @property
     def num_repairs_std(self) -> float:
-        try:
-            return statistics.stdev(self.num_repairs)
-        except statistics.StatisticsError:
-            return 0
+        return std_from_sums(self.num_processed, self.num_repairs_sum, self.num_repairs_sq_sum)
 
     @property
     def num_repairs_histogram(self) -> Histogram:
-        num_repairs = np.asarray(list(self.num_repairs))
-        bins = 0.5 + np.arange(num_repairs.max(initial=1.0) + EPS)
-        return Histogram(*np.histogram(num_repairs, bins=bins))
+        import numpy as np  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        max_num_repairs = max(self.num_repairs_counts, default=1)
+        bins = 0.5 + np.arange(max_num_repairs + EPS)
+        values = np.asarray([self.num_repairs_counts.get(num_repairs, 0) for num_repairs in range(1, len(bins))])
+        return Histogram(values=values, bin_edges=bins)
+
+    def _item_release_hook(self, item: CarUnit) -> None:
+        super()._item_release_hook(item)
+        self.repair_wait_time_sum += item.repair_wait_time
+        self.repair_wait_time_sq_sum += item.repair_wait_time**2
+        self.num_repairs_sum += item.num_repairs
+        self.num_repairs_sq_sum += item.num_repairs**2
+        self.repair_wait_time_sketch.add(item.repair_wait_time)
+        self.num_repairs_counts[item.num_repairs] = self.num_repairs_counts.get(item.num_repairs, 0) + 1
 
     def to_dict(self) -> dict[str, Any]:
         metrics_dict = super().to_dict()
         for metric_name in ('repair_wait_times', 'num_repairs'):
             metrics_dict.pop(metric_name)
+        metrics_dict.update(
+            {f'repair_wait_time_{name}': value for name, value in self.repair_wait_time_sketch.to_dict().items()})
         return metrics_dict
@@ -22,6 +22,7 @@ class RepairQueueingNode(QueueingNode[CarUnit, QM]):
         item.repair_time = 0
 
     def _before_add_task_hook(self, task: Task[CarUnit]) -> None:
+        super()._before_add_task_hook(task)
         item = task.item
         if not item.history:
             input_time = item.created_time
@@ -19,6 +19,10 @@ class BankTransitionNode(BaseTransitionNode[I, NM]):
     def connected_nodes(self) -> Iterable['Node[I, NodeMetrics]']:
         return itertools.chain((self.first, self.second), super().connected_nodes)
 
+    @property
+    def successor_nodes(self) -> Iterable['Node[I, NodeMetrics]']:
+        return (self.first, self.second)
+
     def set_next_nodes(self, first: BankQueueingNode[I], second: BankQueueingNode[I]) -> None:
         self.first = first
         self.second = second
@@ -1,17 +1,17 @@
-from dataclasses import dataclass
+from operator import attrgetter
+from dataclasses import dataclass, field
 
 from qnet.model import ModelMetrics
+from qnet.groups import GroupedMetrics
 
 from .common import HospitalItem, SickType
-from .utils import MeanMeter
 
 
 @dataclass(eq=False)
 class HospitalModelMetrics(ModelMetrics[HospitalItem]):
+    time_per_type: GroupedMetrics[HospitalItem, SickType] = field(
+        init=False, default_factory=lambda: GroupedMetrics(key_fn=attrgetter('sick_type')))
 
     @property
     def mean_time_per_type(self) -> dict[SickType, float]:
-        meters = {name: MeanMeter() for name in SickType}
-        for sick, time in self.time_per_item.items():
-            meters[sick.sick_type].update(time)
-        return {name: meter.mean for name, meter in meters.items()}
+        return {name: self.time_per_type[name].mean if name in self.time_per_type.groups else 0 for name in SickType}
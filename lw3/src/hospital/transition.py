@@ -28,6 +28,10 @@ class EmergencyTransitionNode(BaseTransitionNode[HospitalItem, NM]):
     def connected_nodes(self) -> Iterable['Node[HospitalItem, NodeMetrics]']:
         return itertools.chain((self.chumber, self.reception), super().connected_nodes)
 
+    @property
+    def successor_nodes(self) -> Iterable['Node[HospitalItem, NodeMetrics]']:
+        return (self.chumber, self.reception)
+
     def set_next_nodes(self, chumber: HospitalQueueingNode, reception: HospitalQueueingNode) -> None:
         self.chumber = chumber
         self.reception = reception
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import pickle
+import struct
+import hashlib
+import tempfile
+import functools
+from enum import Enum
+from array import array
+from pathlib import Path
+from numbers import Real
+from types import CodeType
+from typing import Callable, Iterator, Mapping, Optional, Union, Any
+
+from .common import SupportsDict
+
+MetricVector = dict[str, float]
+
+MAGIC = b'QNR1'
+HEADER = struct.Struct('<4sII')
+SUFFIX = '.qnr'
+
+
+@functools.cache
+def get_source_digest() -> str:
+    digest = hashlib.sha256()
+    package_path = Path(__file__).parent
+    for path in sorted(package_path.glob('*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+@functools.cache
+def get_engine_version() -> str:
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+    try:
+        version = metadata.version('qnet')
+    except metadata.PackageNotFoundError:
+        version = '0+unknown'
+    # Engine changes alter results without a release, so the source itself is a part of the version
+    return f'{version}+{get_source_digest()}'
+
+
+def get_code_digest(code: CodeType) -> str:
+    # Line numbers and file names are left out, so moving a function does not invalidate its results
+    consts = [get_code_digest(const) if isinstance(const, CodeType) else repr(const) for const in code.co_consts]
+    payload = repr((code.co_code, code.co_names, code.co_varnames, code.co_freevars, consts))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _callable_to_json(value: Callable[..., Any]) -> Any:
+    name = f'{value.__module__}.{value.__qualname__}'
+    code = getattr(value, '__code__', None)
+    if code is None:
+        return name
+    # Edited functions keep their names, so every function is told apart by its code and captured values
+    closure = [_opaque_to_json(cell.cell_contents) for cell in getattr(value, '__closure__', None) or ()]
+    defaults = [_opaque_to_json(default) for default in getattr(value, '__defaults__', None) or ()]
+    kwdefaults = getattr(value, '__kwdefaults__', None) or {}
+    return {
+        'callable': name,
+        'code': get_code_digest(code),
+        'closure': closure,
+        'defaults': defaults,
+        'kwdefaults': {key: _opaque_to_json(default) for key, default in kwdefaults.items()}
+    }
+
+
+def _opaque_to_json(value: Any) -> Any:
+    try:
+        json.dumps(value, sort_keys=True, default=_to_json)
+        return value
+    except (TypeError, ValueError):
+        pass
+    # Captured objects are rarely JSON serializable, so they are keyed by their pickled state if they have one
+    try:
+        return {'pickle': hashlib.sha256(pickle.dumps(value)).hexdigest()}
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return {'repr': repr(value)}
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, SupportsDict):
+        return {type(value).__qualname__: value.to_dict()}
+    if isinstance(value, functools.partial):
+        return {'func': _to_json(value.func), 'args': value.args, 'keywords': value.keywords}
+    if callable(value) and hasattr(value, '__qualname__'):
+        return _callable_to_json(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f'{type(value)} can not be used in a cache key')
+
+
+def make_key(params: Mapping[str, Any], seed: Optional[int], settings: Mapping[str, Any]) -> str:
+    payload = {'params': params, 'engine': get_engine_version(), 'seed': seed, 'settings': settings}
+    payload_str = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=_to_json)
+    return hashlib.sha256(payload_str.encode()).hexdigest()
+
+
+def to_metric_vector(metrics: Mapping[str, Any]) -> MetricVector:
+    return {
+        name: float(value)
+        for name, value in metrics.items() if isinstance(value, Real) and not isinstance(value, bool)
+    }
+
+
+def encode_metric_vector(metrics: MetricVector) -> bytes:
+    names = '\0'.join(metrics).encode()
+    values = array('d', metrics.values())
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return HEADER.pack(MAGIC, len(values), len(names)) + names + values.tobytes()
+
+
+def decode_metric_vector(data: bytes) -> MetricVector:
+    magic, num_values, names_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Invalid metric vector format')
+    names_end = HEADER.size + names_size
+    names = data[HEADER.size:names_end].decode().split('\0') if num_values else []
+    values = array('d', data[names_end:])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    if len(names) != num_values or len(values) != num_values:
+        raise ValueError('Corrupted metric vector')
+    return dict(zip(names, values))
+
+
+class ResultCache:
+
+    def __init__(self, path: Union[str, os.PathLike], max_size: Optional[int] = 256 * 2**20) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._approx_size = self.size
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def __contains__(self, key: str) -> bool:
+        return self._get_path(key).exists()
+
+    def get(self, key: str) -> Optional[MetricVector]:
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        try:
+            return decode_metric_vector(data)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    def put(self, key: str, metrics: Mapping[str, Any]) -> MetricVector:
+        vector = to_metric_vector(metrics)
+        data = encode_metric_vector(vector)
+        path = self._get_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Atomic rename keeps concurrent readers and writers from seeing partial files
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+        self._approx_size += len(data)
+        if self.max_size is not None and self._approx_size > self.max_size:
+            self.evict()
+        return vector
+
+    def evict(self) -> None:
+        if self.max_size is None:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        target_size = int(0.9 * self.max_size)
+        for path, size, _ in entries:
+            if total_size <= target_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_size -= size
+        self._approx_size = total_size
+
+    def clear(self) -> None:
+        for path, _, _ in self._entries():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._approx_size = 0
+
+    def _get_path(self, key: str) -> Path:
+        return self.path.joinpath(key[:2], f'{key}{SUFFIX}')
+
+    def _entries(self) -> Iterator[tuple[Path, int, float]]:
+        for path in self.path.glob(f'*/*{SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
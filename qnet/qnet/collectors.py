@@ -0,0 +1,131 @@
+from enum import Enum
+from typing import TYPE_CHECKING, Callable, Iterable, Any
+
+from .groups import get_grouped_metrics
+
+if TYPE_CHECKING:
+    from .node import Node
+    from .queueing import QueueingNode, Task
+
+
+class CollectorEvent(str, Enum):
+    ITEM_IN = 'item_in'
+    ITEM_OUT = 'item_out'
+    TASK_START = 'task_start'
+    FAILURE = 'failure'
+    TIME_UPDATE = 'time_update'
+
+
+class Collector:
+
+    @property
+    def events(self) -> list[CollectorEvent]:
+        # Only overridden handlers are subscribed, so the engine never calls no-op collectors
+        return [
+            event for event in CollectorEvent
+            if getattr(type(self), event.value) is not getattr(Collector, event.value)
+        ]
+
+    def item_in(self, node: 'Node', item: Any) -> None:
+        pass
+
+    def item_out(self, node: 'Node', item: Any) -> None:
+        pass
+
+    def task_start(self, node: 'QueueingNode', task: 'Task') -> None:
+        pass
+
+    def failure(self, node: 'QueueingNode') -> None:
+        pass
+
+    def time_update(self, node: 'Node', time: float) -> None:
+        pass
+
+
+CollectorHandlers = dict[CollectorEvent, list[Callable[..., None]]]
+
+
+def get_collector_handlers(collectors: Iterable[Collector]) -> CollectorHandlers:
+    handlers: CollectorHandlers = {event: [] for event in CollectorEvent}
+    for collector in collectors:
+        for event in collector.events:
+            handlers[event].append(getattr(collector, event.value))
+    return handlers
+
+
+class SojournTimeCollector(Collector):
+
+    def item_out(self, node: 'Node', item: Any) -> None:
+        if (in_time := node.get_in_time(item)) is not None:
+            sojourn_time = node.current_time - in_time
+            node.metrics.sojourn_time_sketch.add(sojourn_time)
+            for grouped in get_grouped_metrics(node.metrics):
+                grouped.add(item, sojourn_time)
+
+
+class IntervalsCollector(Collector):
+
+    def item_in(self, node: 'QueueingNode', item: Any) -> None:
+        metrics = node.metrics
+        if metrics.num_in > 1:
+            metrics.in_intervals_sum += node.current_time - metrics.in_time
+            metrics.num_in_intervals += 1
+        metrics.in_time = node.current_time
+
+    def item_out(self, node: 'QueueingNode', item: Any) -> None:
+        metrics = node.metrics
+        if metrics.num_out > 1:
+            metrics.out_intervals_sum += node.current_time - metrics.out_time
+            metrics.num_out_intervals += 1
+        metrics.out_time = node.current_time
+
+
+class LoadCollector(Collector):
+
+    def time_update(self, node: 'QueueingNode', time: float) -> None:
+        metrics = node.metrics
+        dtime = time - node.current_time
+        for channel in node.channel_pool.occupied_channels:
+            metrics.load_time_per_channel[channel.id] = metrics.load_time_per_channel.get(channel.id, 0) + dtime
+        metrics.total_wait_time += node.queuelen * dtime
+
+
+class AggregateLoadCollector(Collector):
+
+    def time_update(self, node: 'QueueingNode', time: float) -> None:
+        metrics = node.metrics
+        dtime = time - node.current_time
+        metrics.busy_time += node.num_tasks * dtime
+        metrics.total_wait_time += node.queuelen * dtime
+
+
+class WaitTimeCollector(Collector):
+
+    def task_start(self, node: 'QueueingNode', task: 'Task') -> None:
+        if (in_time := node.get_in_time(task.item)) is not None:
+            node.metrics.wait_time_sketch.add(node.current_time - in_time)
+
+
+class OccupancyCollector(Collector):
+
+    def time_update(self, node: 'QueueingNode', time: float) -> None:
+        occupancy_time = node.metrics.occupancy_time
+        occupancy = node.queuelen + node.num_tasks
+        occupancy_time[occupancy] = occupancy_time.get(occupancy, 0) + time - node.current_time
+
+
+class WindowCollector(Collector):
+
+    def item_in(self, node: 'QueueingNode', item: Any) -> None:
+        node.metrics.window.add_in()
+
+    def item_out(self, node: 'QueueingNode', item: Any) -> None:
+        node.metrics.window.add_out()
+
+    def failure(self, node: 'QueueingNode') -> None:
+        node.metrics.window.add_failure()
+
+    def time_update(self, node: 'QueueingNode', time: float) -> None:
+        max_channels = node.channel_pool.max_channels
+        load = node.num_tasks / max_channels if max_channels else node.num_tasks
+        node.metrics.window.update_time(node.current_time, time, node.queuelen, load)
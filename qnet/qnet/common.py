@@ -1,12 +1,14 @@
 from collections import deque
+import copy
 import heapq
+import functools
 import itertools
 import inspect
 from enum import Enum
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field, fields, _MISSING_TYPE
-from typing import (TypeVar, Generic, Optional, Iterable, Callable, SupportsFloat, Protocol, Union, Any, cast,
-                    runtime_checkable)
+from dataclasses import dataclass, field, fields, Field, _MISSING_TYPE
+from typing import (TypeVar, Generic, Optional, Iterable, Callable, Sequence, SupportsFloat, Protocol, Union, Any,
+                    cast, runtime_checkable)
 
 INF_TIME = float('inf')
 TIME_EPS = 1e-6
@@ -26,6 +28,34 @@ class SupportsDict(Protocol):
 class ActionType(str, Enum):
     IN = 'in'
     OUT = 'out'
+    RELEASE = 'release'
+
+
+class MergeRule(str, Enum):
+    SUM = 'sum'
+    MAX = 'max'
+    KEEP = 'keep'
+    DROP = 'drop'
+
+
+def merge_rule(rule: MergeRule) -> dict[str, MergeRule]:
+    return {'merge': rule}
+
+
+def _merge_values(rule: MergeRule, value: Any, other: Any) -> Any:
+    if rule in (MergeRule.KEEP, MergeRule.DROP):
+        return value
+    if rule == MergeRule.MAX:
+        return max(value, other)
+    if hasattr(value, 'merge'):
+        return value.merge(other)
+    if isinstance(value, dict):
+        for key, other_value in other.items():
+            value[key] = _merge_values(rule, value[key], other_value) if key in value else copy.copy(other_value)
+        return value
+    if isinstance(value, set):
+        return value | other
+    return value + other
 
 
 @dataclass(eq=False)
@@ -61,10 +91,29 @@ class Item(SupportsDict):
         return {'id': self.id}
 
 
+def memoized_property(fget: Callable[[Any], T]) -> property:
+    name = fget.__name__
+
+    @functools.wraps(fget)
+    def getter(self: 'Metrics') -> T:
+        key = self.memo_key()
+        memo = self.__dict__.setdefault('_memo', {})
+        if (cached := memo.get(name)) is not None and cached[0] == key:
+            return cached[1]
+        value = fget(self)
+        memo[name] = (key, value)
+        return value
+
+    return property(getter)
+
+
 @dataclass(eq=False)
 class Metrics(Protocol):
     passed_time: float = field(init=False, default=0)
 
+    def memo_key(self) -> tuple[Any, ...]:
+        return (self.passed_time, )
+
     def to_dict(self) -> dict[str, Any]:
         metrics_dict = {
             name: getattr(self, name)
@@ -74,14 +123,46 @@ class Metrics(Protocol):
         return metrics_dict
 
     def reset(self) -> None:
+        self.__dict__.pop('_memo', None)
         for param in fields(self):
-            if not isinstance(param.default, _MISSING_TYPE):
-                default = param.default
-            elif not isinstance(param.default_factory, _MISSING_TYPE):
-                default = param.default_factory()
+            if _has_default(param):
+                setattr(self, param.name, _get_default(param))
+
+    def state(self: M) -> M:
+        state = copy.copy(self)
+        state.__dict__.pop('_memo', None)
+        for param in fields(self):
+            if param.metadata.get('merge') == MergeRule.DROP and _has_default(param):
+                setattr(state, param.name, _get_default(param))
             else:
-                continue
-            setattr(self, param.name, default)
+                setattr(state, param.name, copy.deepcopy(getattr(self, param.name)))
+        return state
+
+    def merge(self: M, other: M) -> M:
+        self.__dict__.pop('_memo', None)
+        for param in fields(self):
+            rule = param.metadata.get('merge', MergeRule.SUM)
+            setattr(self, param.name, _merge_values(rule, getattr(self, param.name), getattr(other, param.name)))
+        return self
+
+
+def _has_default(param: Field) -> bool:
+    return not isinstance(param.default, _MISSING_TYPE) or not isinstance(param.default_factory, _MISSING_TYPE)
+
+
+def _get_default(param: Field) -> Any:
+    if not isinstance(param.default, _MISSING_TYPE):
+        return param.default
+    return cast(Callable[[], Any], param.default_factory)()
+
+
+def reduce_metrics(metrics: Sequence[M]) -> M:
+    assert metrics, 'Nothing to reduce'
+    states = [value.state() for value in metrics]
+    while len(states) > 1:
+        states = [states[idx].merge(states[idx + 1]) if idx + 1 < len(states) else states[idx]
+                  for idx in range(0, len(states), 2)]
+    return states[0]
 
 
 class BoundedCollection(ABC, SupportsDict, Generic[T]):
@@ -205,6 +286,55 @@ class MinHeap(BoundedCollection[T]):
         return heapq.heappop(self.heap)
 
 
+class IndexedHeap:
+
+    def __init__(self, keys: Sequence[Any] = ()) -> None:
+        self.keys = list(keys)
+        self.heap = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.positions = [0] * len(self.keys)
+        for pos, idx in enumerate(self.heap):
+            self.positions[idx] = pos
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    @property
+    def top(self) -> int:
+        return self.heap[0]
+
+    def update(self, idx: int, key: Any) -> None:
+        old_key = self.keys[idx]
+        self.keys[idx] = key
+        if key < old_key:
+            self._sift_up(self.positions[idx])
+        elif old_key < key:
+            self._sift_down(self.positions[idx])
+
+    def _swap(self, pos: int, other_pos: int) -> None:
+        heap = self.heap
+        heap[pos], heap[other_pos] = heap[other_pos], heap[pos]
+        self.positions[heap[pos]] = pos
+        self.positions[heap[other_pos]] = other_pos
+
+    def _sift_up(self, pos: int) -> None:
+        while pos > 0:
+            parent = (pos - 1) // 2
+            if not self.keys[self.heap[pos]] < self.keys[self.heap[parent]]:
+                break
+            self._swap(pos, parent)
+            pos = parent
+
+    def _sift_down(self, pos: int) -> None:
+        size = len(self.heap)
+        while (child := 2 * pos + 1) < size:
+            if child + 1 < size and self.keys[self.heap[child + 1]] < self.keys[self.heap[child]]:
+                child += 1
+            if not self.keys[self.heap[child]] < self.keys[self.heap[pos]]:
+                break
+            self._swap(pos, child)
+            pos = child
+
+
 PriorityTuple = Union[tuple[SupportsFloat, T], tuple[SupportsFloat, int, T]]
 
 
@@ -7,10 +7,17 @@ from typing import TypeVar, Generic, Sequence, Sized, Callable, overload
 INF_TIME = float('inf')
 TIME_EPS = 1e-6
 
+# The shared generator behind the module-level sampling functions
+GENERATOR = random.random.__self__
+
 T = TypeVar('T')
 V = TypeVar('V')
 
 
+def constant(value: float) -> float:
+    return value
+
+
 def erlang(lambd: float, k: int) -> float:
     product = 1.0
     for _ in range(k):
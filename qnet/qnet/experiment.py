@@ -0,0 +1,117 @@
+import random
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterator, Mapping, Optional, Sequence, Union, Any
+
+from .common import reduce_metrics
+from .node import NodeMetrics
+from .model import Model, ModelMetrics, Verbosity
+from .cache import MetricVector, ResultCache, make_key, to_metric_vector
+from .variance import antithetic, average_metric_vectors
+
+Metrics = dict[str, Any]
+ModelFactory = Callable[..., Model]
+MetricsStates = list[Union[ModelMetrics, NodeMetrics]]
+
+
+@dataclass(frozen=True)
+class RunSettings:
+    simulation_time: float
+    warmup_time: float = 0
+    antithetic: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def gather_metrics(model: Model) -> Metrics:
+    metrics: Metrics = {}
+
+    for name, value in model.model_metrics.to_dict().items():
+        metrics[f'model__{name}'] = value
+
+    for report in model.evaluation_reports:
+        metrics[f'evaluation__{report.name}'] = report.result
+
+    for node_metrics in model.nodes_metrics:
+        for name, value in node_metrics.to_dict().items():
+            metrics[f'{node_metrics.node_name}__{name}'] = value
+
+    return metrics
+
+
+def simulate_model(model: Model, settings: RunSettings) -> None:
+    if settings.warmup_time > 0:
+        model.simulate(settings.warmup_time, verbosity=Verbosity.NONE)
+        model.reset_metrics()
+    model.simulate(settings.warmup_time + settings.simulation_time, verbosity=Verbosity.NONE)
+
+
+def run_model(model: Model, settings: RunSettings) -> Metrics:
+    simulate_model(model, settings)
+    return gather_metrics(model)
+
+
+def get_metrics_states(model: Model) -> MetricsStates:
+    return [model.model_metrics.state(), *(metrics.state() for metrics in model.nodes_metrics)]
+
+
+def run_metrics_states(factory: ModelFactory, params: Mapping[str, Any], settings: RunSettings,
+                       seed: int) -> MetricsStates:
+    runs_states: list[MetricsStates] = []
+    for is_antithetic in ((False, True) if settings.antithetic else (False, )):
+        random.seed(seed)
+        with antithetic(is_antithetic):
+            model = factory(**params)
+            simulate_model(model, settings)
+        runs_states.append(get_metrics_states(model))
+    return runs_states[0] if len(runs_states) == 1 else reduce_metrics_states(runs_states)
+
+
+def reduce_metrics_states(runs_states: Sequence[MetricsStates]) -> MetricsStates:
+    return [reduce_metrics(states) for states in zip(*runs_states)]
+
+
+def sample_metrics(model: Model, start_time: float, end_time: float, step_time: float) -> Iterator[Metrics]:
+    while model.step(start_time):
+        pass
+    model.reset_metrics()
+
+    num_steps = int((end_time - start_time) // step_time)
+    for step in range(1, num_steps + 1):
+        next_time = start_time + step * step_time
+        while model.next_time < next_time:
+            model.step(end_time)
+        model.goto(next_time, end_time)
+        yield gather_metrics(model)
+
+
+def get_run_key(factory: ModelFactory, params: Mapping[str, Any], settings: RunSettings, seed: int) -> str:
+    return make_key(params=params, seed=seed, settings={**settings.to_dict(), 'factory': factory})
+
+
+def run_replication(factory: ModelFactory,
+                    params: Mapping[str, Any],
+                    settings: RunSettings,
+                    seed: int,
+                    cache: Optional[ResultCache] = None) -> MetricVector:
+    if cache is not None:
+        key = get_run_key(factory, params, settings, seed)
+        if (cached := cache.get(key)) is not None:
+            return cached
+    random.seed(seed)
+    metrics = to_metric_vector(run_model(factory(**params), settings))
+    if settings.antithetic:
+        # The pair shares the seed, so the second run draws the complements of the first run uniforms
+        random.seed(seed)
+        with antithetic():
+            metrics = average_metric_vectors(metrics, to_metric_vector(run_model(factory(**params), settings)))
+    return metrics if cache is None else cache.put(key, metrics)
+
+
+def replicate(factory: ModelFactory,
+              params: Mapping[str, Any],
+              settings: RunSettings,
+              num_runs: int,
+              seed: int = 0,
+              cache: Optional[ResultCache] = None) -> list[MetricVector]:
+    return [run_replication(factory, params, settings, seed=seed + idx, cache=cache) for idx in range(num_runs)]
@@ -1,6 +1,6 @@
 import itertools
 from abc import abstractmethod
-from typing import Iterable, Optional, Any
+from typing import Callable, Iterable, Optional, Any
 
 from .common import I, Item
 from .node import NM, Node
@@ -9,15 +9,17 @@ from .utils import filter_none
 
 class BaseFactoryNode(Node[I, NM]):
 
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(self, batch_size_fn: Optional[Callable[[], float]] = None, **kwargs: Any) -> None:
         super().__init__(**kwargs)
+        self.batch_size_fn = batch_size_fn
         self.item: Optional[I] = None
+        self.batch: list[I] = []
         self.next_time = self._predict_next_time()
         self.counter = itertools.count()
 
     @property
     def current_items(self) -> Iterable[I]:
-        return filter_none((self.item, ))
+        return self.batch if self.batch_size_fn is not None else filter_none((self.item, ))
 
     @property
     def next_id(self) -> str:
@@ -28,13 +30,23 @@ class BaseFactoryNode(Node[I, NM]):
         raise RuntimeError('This method must not be called!')
 
     def end_action(self) -> I:
-        self.item = self._get_next_item()
+        if self.batch_size_fn is None:
+            self.item = self._get_next_item()
+            self.next_time = self._predict_next_time()
+            return self._end_action(self.item)
+        if (batch_size := int(self.batch_size_fn())) < 1:
+            raise ValueError(f'Batch size of "{self.name}" must be positive. Given: {batch_size}')
+        # A batch is one event, while its items are created and passed on one by one
+        self.batch = [self._get_next_item() for _ in range(batch_size)]
         self.next_time = self._predict_next_time()
-        return self._end_action(self.item)
+        for item in self.batch:
+            self.item = self._end_action(item)
+        return self.batch[-1]
 
     def reset(self) -> None:
         super().reset()
         self.item = None
+        self.batch = []
         self.next_time = self._predict_next_time()
 
     def to_dict(self) -> dict[str, Any]:
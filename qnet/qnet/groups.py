@@ -0,0 +1,93 @@
+import math
+from dataclasses import dataclass, field, fields
+from typing import Callable, Generic, Hashable, Optional, TypeVar, Any
+
+from .common import I, Metrics
+from .sketch import QuantileSketch
+
+K = TypeVar('K', bound=Hashable)
+
+KeyFn = Callable[[I], K]
+ValueFn = Callable[[I], float]
+
+
+@dataclass(eq=False)
+class GroupStats:
+    count: int = 0
+    mean: float = 0
+    sq_dev_sum: float = 0
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    @property
+    def variance(self) -> float:
+        return self.sq_dev_sum / (self.count - 1) if self.count > 1 else 0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def add(self, value: float) -> None:
+        # Welford's update
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.sq_dev_sum += delta * (value - self.mean)
+        self.sketch.add(value)
+
+    def merge(self, other: 'GroupStats') -> 'GroupStats':
+        # Chan's parallel update
+        count = self.count + other.count
+        if count > 0:
+            delta = other.mean - self.mean
+            self.sq_dev_sum += other.sq_dev_sum + delta**2 * self.count * other.count / count
+            self.mean += delta * other.count / count
+        self.count = count
+        self.sketch.merge(other.sketch)
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, **self.sketch.to_dict()}
+
+
+class GroupedMetrics(Generic[I, K]):
+
+    def __init__(self, key_fn: KeyFn[I, K], value_fn: Optional[ValueFn[I]] = None) -> None:
+        self.key_fn = key_fn
+        self.value_fn = value_fn
+        self.groups: dict[K, GroupStats] = {}
+
+    def __getitem__(self, key: K) -> GroupStats:
+        return self.groups[key]
+
+    @property
+    def means(self) -> dict[K, float]:
+        return {key: group.mean for key, group in self.groups.items()}
+
+    def add(self, item: I, value: float) -> None:
+        key = self.key_fn(item)
+        if (group := self.groups.get(key)) is None:
+            group = self.groups[key] = GroupStats()
+        group.add(value if self.value_fn is None else self.value_fn(item))
+
+    def merge(self, other: 'GroupedMetrics[I, K]') -> 'GroupedMetrics[I, K]':
+        for key, group in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(group)
+            else:
+                self.groups[key] = GroupStats().merge(group)
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {str(key): group.to_dict() for key, group in self.groups.items()}
+
+
+_GROUPED_FIELDS: dict[type, tuple[str, ...]] = {}
+
+
+def get_grouped_metrics(metrics: Metrics) -> list[GroupedMetrics]:
+    names = _GROUPED_FIELDS.get(type(metrics))
+    if names is None:
+        names = tuple(
+            param.name for param in fields(metrics) if isinstance(getattr(metrics, param.name), GroupedMetrics))
+        _GROUPED_FIELDS[type(metrics)] = names
+    return [getattr(metrics, name) for name in names]
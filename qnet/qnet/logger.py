@@ -1,13 +1,12 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from collections.abc import Mapping, Iterable
-from typing import Callable, Generic, TypeVar, Any
-
-import prettytable as pt
+from typing import Callable, Generic, Optional, TypeVar, Any
 
 from .common import T, I, SupportsDict, Metrics
 from .node import Node, NodeMetrics
 from .model import EvaluationReport, ModelMetrics
+from .trace import DeltaEncoder, NodeSnapshot, NodeState, StateDelta, plain_snapshot
 
 M_contra = TypeVar('M_contra', bound=Metrics, contravariant=True)
 N_contra = TypeVar('N_contra', bound=Node, contravariant=True)
@@ -23,6 +22,10 @@ class BaseLogger(ABC, Generic[I]):
     def nodes_states(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
         raise NotImplementedError
 
+    def nodes_deltas(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
+        # Delta logging is optional, so loggers written before it keep working
+        pass
+
     @abstractmethod
     def model_metrics(self, model_metrics: ModelMetrics) -> None:
         raise NotImplementedError
@@ -41,6 +44,7 @@ class CLILogger(BaseLogger[I]):
     def __init__(self, precision: int = 3, max_column_width: int = 60, max_table_width: int = 100) -> None:
         self.precision = precision
         self.table_kwargs = dict(align='l', max_width=max_column_width, max_table_width=max_table_width)
+        self.delta_encoder = DeltaEncoder[I](snapshot=self._node_snapshot)
 
     # Formatters
     def _format(self, value: Any) -> str:
@@ -105,6 +109,10 @@ class CLILogger(BaseLogger[I]):
             return self._to_dict
         raise RuntimeError(f'{type(node)} must be inherited from "Node"')
 
+    def _node_snapshot(self, node: Node[I, NodeMetrics]) -> NodeState:
+        state_dict = self._dispatch_node_logger(node)(node)
+        return {name: self._format(value) for name, value in state_dict.items()}
+
     # Node metrics
     def _dispatch_node_metrics_logger(self, metrics: NodeMetrics) -> MetricsLoggerDispatcher:
         if isinstance(metrics, SupportsDict):
@@ -119,6 +127,7 @@ class CLILogger(BaseLogger[I]):
 
     # Interface
     def nodes_states(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
+        import prettytable as pt  # pylint: disable=import-outside-toplevel
         table = pt.PrettyTable(field_names=['Node', 'State', 'Action'], **self.table_kwargs)
         for node in nodes:
             state_dict = self._dispatch_node_logger(node)(node)
@@ -128,13 +137,23 @@ class CLILogger(BaseLogger[I]):
         print(f'Time: {self._format(time)}')
         print(table.get_string(title='Nodes States', hrules=pt.ALL, sortby='Node'))
 
+    def nodes_deltas(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
+        import prettytable as pt  # pylint: disable=import-outside-toplevel
+        table = pt.PrettyTable(field_names=['Node', 'Changes'], **self.table_kwargs)
+        for name, changes in self.delta_encoder.encode(nodes).items():
+            table.add_row([name, self._format_dict(changes, join_chars='\n', split_chars=': ')])
+        print(f'Time: {self._format(time)}')
+        print(table.get_string(title='Nodes Changes', hrules=pt.ALL, sortby='Node'))
+
     def model_metrics(self, model_metrics: ModelMetrics[I]) -> None:
+        import prettytable as pt  # pylint: disable=import-outside-toplevel
         table = pt.PrettyTable(field_names=['Metrics'], **self.table_kwargs)
         metrics_dict = self._dispatch_model_metrics_logger(model_metrics)(model_metrics)
         table.add_row([self._format_metrics_dict(metrics_dict)])
         print(table.get_string(title='Model Metrics'))
 
     def nodes_metrics(self, nodes_metrics: list[NodeMetrics]) -> None:
+        import prettytable as pt  # pylint: disable=import-outside-toplevel
         table = pt.PrettyTable(field_names=['Node', 'Metrics'], **self.table_kwargs)
         for metrics in nodes_metrics:
             metrics_dict = self._dispatch_node_metrics_logger(metrics)(metrics)
@@ -142,7 +161,34 @@ class CLILogger(BaseLogger[I]):
         print(table.get_string(title='Nodes Metrics', hrules=pt.ALL, sortby='Node'))
 
     def evaluation_reports(self, evaluation_reports: list[EvaluationReport]) -> None:
+        import prettytable as pt  # pylint: disable=import-outside-toplevel
         table = pt.PrettyTable(field_names=['Report', 'Result'], **self.table_kwargs)
         for report in evaluation_reports:
             table.add_row([report.name, self._format(report.result)])
         print(table.get_string(title='Evaluation Reports', hrules=pt.ALL, sortby='Report'))
+
+
+class TraceLogger(BaseLogger[I]):
+
+    def __init__(self, logger: Optional[BaseLogger[I]] = None, snapshot: NodeSnapshot = plain_snapshot) -> None:
+        self.logger = logger
+        self.delta_encoder = DeltaEncoder[I](snapshot=snapshot)
+        self.deltas: list[StateDelta] = []
+
+    def nodes_states(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
+        self.nodes_deltas(time, nodes)
+
+    def nodes_deltas(self, time: float, nodes: list[Node[I, NodeMetrics]]) -> None:
+        self.deltas.append(StateDelta(time=time, nodes=self.delta_encoder.encode(nodes)))
+
+    def model_metrics(self, model_metrics: ModelMetrics[I]) -> None:
+        if self.logger is not None:
+            self.logger.model_metrics(model_metrics)
+
+    def nodes_metrics(self, nodes_metrics: list[NodeMetrics]) -> None:
+        if self.logger is not None:
+            self.logger.nodes_metrics(nodes_metrics)
+
+    def evaluation_reports(self, evaluation_reports: list[EvaluationReport]) -> None:
+        if self.logger is not None:
+            self.logger.evaluation_reports(evaluation_reports)
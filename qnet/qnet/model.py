@@ -1,14 +1,20 @@
-import statistics
+import copy
 from enum import Flag
+from functools import partial
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Callable, Generic, Iterable, Optional, TypeVar, Any, cast
+from typing import TYPE_CHECKING, Callable, Generic, Iterable, Iterator, NamedTuple, Optional, TypeVar, Any, cast
 
-import dill
-
-from .common import INF_TIME, TIME_EPS, T, I, Metrics
+from .common import INF_TIME, TIME_EPS, T, I, Metrics, MergeRule, ActionType, merge_rule
 from .node import Node, NodeMetrics
 from .factory import BaseFactoryNode
 from .queueing import QueueingNode
+from .transition import BaseTransitionNode, InlineWorklist
+from .topology import Topology, discover_nodes, compile_topology
+from .dist import GENERATOR
+from .stats import mean_from_sums, std_from_sums
+from .sketch import QuantileSketch
+from .groups import get_grouped_metrics
+from .trace import StateSampling, StateTracer
 
 if TYPE_CHECKING:
     from .logger import BaseLogger
@@ -20,20 +26,10 @@ class Nodes(dict[str, Node[I, NodeMetrics]]):
 
     @staticmethod
     def from_node_tree_root(node_tree_root: Node[I, NodeMetrics]) -> 'Nodes[I]':
-        nodes = Nodes[I]()
-
-        def process_node(parent: Node[I, NodeMetrics]) -> None:
-            if parent.name in nodes:
-                if nodes[parent.name] == parent:
-                    return
-                else:
-                    raise ValueError('Nodes must have different names')
-            nodes[parent.name] = parent
-            for node in parent.connected_nodes:
-                process_node(node)
+        return Nodes[I]((node.name, node) for node in discover_nodes(node_tree_root))
 
-        process_node(node_tree_root)
-        return nodes
+    def compile(self) -> Topology[I]:
+        return compile_topology(self.values())
 
 
 @dataclass(eq=False)
@@ -51,16 +47,35 @@ class Evaluation(Generic[T]):
         return EvaluationReport[T](name=self.name, result=self.evaluate(model))
 
 
+class Event(NamedTuple):
+    time: float
+    node: int
+    action_type: ActionType
+    item_id: str
+
+
+def _buffer_event(buffer: list[Event], action_type: ActionType, node: Node[I, NodeMetrics], item: I) -> None:
+    buffer.append(Event(node.current_time, node.index, action_type, item.id))
+
+
 class Verbosity(Flag):
     NONE = 0b00
-    STATE = 0b01
-    METRICS = 0b10
+    STATE = 0b001
+    METRICS = 0b010
+    DELTA = 0b100
 
 
 @dataclass(eq=False)
 class ModelMetrics(Metrics, Generic[I]):
     num_events: int = field(init=False, default=0)
-    items: set[I] = field(init=False, default_factory=set)
+    items: set[I] = field(init=False, default_factory=set, metadata=merge_rule(MergeRule.DROP))
+    num_processed: int = field(init=False, default=0)
+    time_in_system_sum: float = field(init=False, default=0)
+    time_in_system_sq_sum: float = field(init=False, default=0)
+    time_in_system_sketch: QuantileSketch = field(init=False, default_factory=QuantileSketch)
+
+    def memo_key(self) -> tuple[Any, ...]:
+        return (self.passed_time, self.num_events, self.num_processed)
 
     @property
     def mean_event_intensity(self) -> float:
@@ -76,13 +91,28 @@ class ModelMetrics(Metrics, Generic[I]):
 
     @property
     def mean_time_in_system(self) -> float:
-        return statistics.mean(time_data) if (time_data := self.time_per_item.values()) else 0
+        return mean_from_sums(self.num_processed, self.time_in_system_sum)
+
+    @property
+    def std_time_in_system(self) -> float:
+        return std_from_sums(self.num_processed, self.time_in_system_sum, self.time_in_system_sq_sum)
+
+    def _item_release_hook(self, item: I) -> None:
+        time_in_system = item.time_in_system
+        self.num_processed += 1
+        self.time_in_system_sum += time_in_system
+        self.time_in_system_sq_sum += time_in_system**2
+        self.time_in_system_sketch.add(time_in_system)
+        for grouped in get_grouped_metrics(self):
+            grouped.add(item, time_in_system)
 
     def to_dict(self) -> dict[str, Any]:
         metrics_dict = super().to_dict()
         for metric_name in ('processed_items', 'time_per_item'):
             metrics_dict.pop(metric_name)
         metrics_dict['num_events'] = self.num_events
+        metrics_dict.update(
+            {f'time_in_system_{name}': value for name, value in self.time_in_system_sketch.to_dict().items()})
         return metrics_dict
 
 
@@ -92,17 +122,23 @@ class Model(Generic[I, MM]):
                  nodes: Nodes[I],
                  logger: 'BaseLogger[I]',
                  metrics: MM,
-                 evaluations: Optional[list[Evaluation]] = None) -> None:
+                 evaluations: Optional[list[Evaluation]] = None,
+                 track_items: bool = True) -> None:
         self.nodes = nodes
+        self.topology = nodes.compile()
         self.logger = logger
         self.metrics = metrics
         self.evaluations = [] if evaluations is None else evaluations
+        self.track_items = track_items
         self.current_time = 0.0
+        self.version = 0
+        self._evaluation_reports: Optional[tuple[int, list[EvaluationReport]]] = None
+        self.attach()
         self.collect_items()
 
     @property
     def next_time(self) -> float:
-        return min(INF_TIME, *(node.next_time for node in self.nodes.values()))
+        return min((node.next_time for node in self.topology.nodes), default=INF_TIME)
 
     @property
     def model_metrics(self) -> MM:
@@ -110,61 +146,129 @@ class Model(Generic[I, MM]):
 
     @property
     def nodes_metrics(self) -> list[NodeMetrics]:
-        return [node.metrics for node in self.nodes.values()]
+        return [node.metrics for node in self.topology.nodes]
 
     @property
     def evaluation_reports(self) -> list[EvaluationReport]:
-        return [evaluation(self) for evaluation in self.evaluations]
+        if self._evaluation_reports is None or self._evaluation_reports[0] != self.version:
+            self._evaluation_reports = (self.version, [evaluation(self) for evaluation in self.evaluations])
+        return self._evaluation_reports[1]
+
+    def attach(self) -> None:
+        # Transitions of one model share a worklist, so items handed between them are routed one after another
+        worklist = InlineWorklist[I]()
+        for node in self.topology.nodes:
+            if isinstance(node, BaseTransitionNode):
+                node.worklist = worklist
+            # Nodes report releases to one model at a time, so a model built over them later takes them over
+            node.listeners[ActionType.RELEASE] = [
+                listener for listener in node.listeners[ActionType.RELEASE]
+                if not isinstance(getattr(listener, '__self__', None), Model)
+            ]
+            node.add_listener(ActionType.RELEASE, self._item_release_hook)
+
+    def detach(self) -> None:
+        for node in self.topology.nodes:
+            if self._item_release_hook in node.listeners[ActionType.RELEASE]:
+                node.remove_listener(ActionType.RELEASE, self._item_release_hook)
 
     def reset_metrics(self) -> None:
-        for node in self.nodes.values():
+        self.version += 1
+        for node in self.topology.nodes:
             node.reset_metrics()
         self.metrics.reset()
 
     def reset(self) -> None:
+        self.version += 1
         self.current_time = 0
-        for node in self.nodes.values():
+        for node in self.topology.nodes:
             node.reset()
         self.metrics.reset()
 
-    def simulate(self, end_time: float, verbosity: Verbosity = Verbosity.METRICS) -> None:
-        while self.step(end_time):
-            # Log states
-            if Verbosity.STATE in verbosity:
-                self.logger.nodes_states(self.current_time, list(self.nodes.values()))
+    def simulate(self,
+                 end_time: float,
+                 verbosity: Verbosity = Verbosity.METRICS,
+                 sampling: Optional[StateSampling] = None) -> None:
+        if verbosity & (Verbosity.STATE | Verbosity.DELTA):
+            self._simulate_traced(end_time, verbosity, StateTracer[I](self.topology, sampling))
+        else:
+            while self.step(end_time):
+                pass
         # Log metrics
         if Verbosity.METRICS in verbosity:
             self.logger.model_metrics(self.model_metrics)
             self.logger.nodes_metrics(self.nodes_metrics)
             self.logger.evaluation_reports(self.evaluation_reports)
 
+    def _simulate_traced(self, end_time: float, verbosity: Verbosity, tracer: StateTracer[I]) -> None:
+        tracer.attach()
+        try:
+            while self.step(end_time):
+                if (touched_nodes := tracer.poll(self.current_time)) is not None:
+                    self._log_states(verbosity, touched_nodes)
+        finally:
+            tracer.detach()
+        # Events skipped by sampling would be lost for the replay otherwise
+        if tracer.has_pending:
+            self._log_states(verbosity, tracer.flush(self.current_time))
+
+    def _log_states(self, verbosity: Verbosity, touched_nodes: list[Node[I, NodeMetrics]]) -> None:
+        if Verbosity.STATE in verbosity:
+            self.logger.nodes_states(self.current_time, list(self.topology.nodes))
+        if Verbosity.DELTA in verbosity:
+            self.logger.nodes_deltas(self.current_time, touched_nodes)
+
+    def events(self,
+               end_time: float = INF_TIME,
+               action_types: Iterable[ActionType] = tuple(ActionType)) -> Iterator[Event]:
+        buffer: list[Event] = []
+        listeners = {action_type: partial(_buffer_event, buffer, action_type) for action_type in action_types}
+        for node in self.topology.nodes:
+            for action_type, listener in listeners.items():
+                node.add_listener(action_type, listener)
+        try:
+            while self.step(end_time):
+                yield from buffer
+                buffer.clear()
+        finally:
+            for node in self.topology.nodes:
+                for action_type, listener in listeners.items():
+                    node.remove_listener(action_type, listener)
+
     def step(self, end_time: float = INF_TIME) -> bool:
         next_time = self.next_time
         self.goto(next_time, end_time=end_time)
         return next_time <= end_time
 
     def goto(self, time: float, end_time: float = INF_TIME) -> None:
-        new_current_time = min(time, end_time)
-        self._before_time_update_hook(new_current_time)
         # Move to that action or simulation end
-        self.current_time = new_current_time
-        for node in self.nodes.values():
-            node.update_time(self.current_time)
+        self.advance(min(time, end_time))
         # Select nodes to be updated now
         end_action_nodes: list[Node[I, NodeMetrics]] = []
-        for node in self.nodes.values():
+        for node in self.topology.nodes:
             if abs(self.current_time - node.next_time) <= TIME_EPS:
                 end_action_nodes.append(node)
         # Run actions
         for node in end_action_nodes:
             node.end_action()
             self._after_node_end_action_hook(node)
-        self.collect_items()
+        self.collect_items(full=False)
 
-    def collect_items(self) -> None:
-        for node in self.nodes.values():
-            for item in node.current_items:
-                self.metrics.items.add(item)
+    def advance(self, time: float) -> None:
+        self.version += 1
+        self._before_time_update_hook(time)
+        self.current_time = time
+        for node in self.topology.nodes:
+            node.update_time(self.current_time)
+
+    def collect_items(self, full: bool = True) -> None:
+        # Nodes changed outside of steps (e.g. by added tasks) are collected again, so cached reports are stale too
+        self.version += 1
+        # Released items stay referenced by the model metrics unless tracking is disabled
+        if not self.track_items:
+            return
+        for node in self.topology.nodes:
+            self.metrics.items.update(node.current_items if full else node.tracked_items)
 
     def _before_time_update_hook(self, time: float) -> None:
         self.metrics.passed_time += time - self.current_time
@@ -173,9 +277,18 @@ class Model(Generic[I, MM]):
         if isinstance(node, (BaseFactoryNode, QueueingNode)):
             self.metrics.num_events += 1
 
+    def _item_release_hook(self, _: Node[I, NodeMetrics], item: I) -> None:
+        self.metrics._item_release_hook(item)
+
+    def clone(self) -> 'Model[I, MM]':
+        # Delay functions are bound to the shared generator, which must not be copied for clones to diverge
+        return copy.deepcopy(self, {id(GENERATOR): GENERATOR})
+
     def dumps(self) -> bytes:
+        import dill  # pylint: disable=import-outside-toplevel
         return dill.dumps(self)
 
     @staticmethod
     def loads(model_bytes: bytes) -> 'Model[I, MM]':
+        import dill  # pylint: disable=import-outside-toplevel
         return cast(Model[I, MM], dill.loads(model_bytes))
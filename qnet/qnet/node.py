@@ -3,25 +3,34 @@ import inspect
 from dataclasses import dataclass, field
 from typing import Callable, Generic, Iterable, Optional, TypeVar, Any, cast
 
-from .common import I, SupportsDict, Metrics, ActionRecord, ActionType
+from .common import I, SupportsDict, Metrics, MergeRule, ActionRecord, ActionType, merge_rule
+from .sketch import QuantileSketch
+from .collectors import Collector, CollectorEvent, SojournTimeCollector, get_collector_handlers
 from .utils import filter_none
 
 NM = TypeVar('NM', bound='NodeMetrics')
 
 DelayFn = Callable[..., float]
+ActionListener = Callable[['Node[I, NodeMetrics]', I], None]
 
 
 @dataclass(eq=False)
 class NodeMetrics(Metrics):
-    node_name: str = field(init=False, default='')
+    node_name: str = field(init=False, default='', metadata=merge_rule(MergeRule.KEEP))
     num_in: int = field(init=False, default=0)
     num_out: int = field(init=False, default=0)
-    start_action_time: float = field(init=False, default=-1)
-    end_action_time: float = field(init=False, default=-1)
+    start_action_time: float = field(init=False, default=-1, metadata=merge_rule(MergeRule.MAX))
+    end_action_time: float = field(init=False, default=-1, metadata=merge_rule(MergeRule.MAX))
+    sojourn_time_sketch: QuantileSketch = field(init=False, default_factory=QuantileSketch)
+
+    def memo_key(self) -> tuple[Any, ...]:
+        return (self.passed_time, self.num_in, self.num_out)
 
     def to_dict(self) -> dict[str, Any]:
         metrics_dict = super().to_dict()
         metrics_dict.update({'num_in': self.num_in, 'num_out': self.num_out})
+        metrics_dict.update(
+            {f'sojourn_time_{name}': value for name, value in self.sojourn_time_sketch.to_dict().items()})
         return metrics_dict
 
 
@@ -32,30 +41,57 @@ class Node(ABC, SupportsDict, Generic[I, NM]):
                  delay_fn: DelayFn,
                  metrics: NM,
                  name: Optional[str] = None,
-                 next_node: Optional['Node[I, NodeMetrics]'] = None) -> None:
+                 next_node: Optional['Node[I, NodeMetrics]'] = None,
+                 collectors: Optional[Iterable[Collector]] = None) -> None:
         self.num_nodes += 1
         self.delay_fn = delay_fn
-        self.delay_params = inspect.signature(self.delay_fn).parameters
+        self.delay_params = frozenset(inspect.signature(self.delay_fn).parameters)
         self.metrics = metrics
         self.name = self._get_auto_name() if name is None else name
         self.metrics.node_name = self.name
         self.next_node = next_node
         self.prev_node: Optional[Node[I, NodeMetrics]] = None
+        self.index: int = -1
+        self.listeners: dict[ActionType, list[ActionListener]] = {action_type: [] for action_type in ActionType}
         self.current_time: float = 0
         self.next_time: float = 0
+        self.set_collectors(self.default_collectors() if collectors is None else collectors)
 
     @property
     def connected_nodes(self) -> Iterable['Node[I, NodeMetrics]']:
         return filter_none((self.prev_node, self.next_node))
 
+    @property
+    def successor_nodes(self) -> Iterable['Node[I, NodeMetrics]']:
+        return filter_none((self.next_node, ))
+
     @property
     def current_items(self) -> Iterable[I]:
         return []
 
+    @property
+    def tracked_items(self) -> Iterable[I]:
+        # Items that may be new to the model since the last step, which is all of them unless a node knows better
+        return self.current_items
+
+    def default_collectors(self) -> list[Collector]:
+        return [SojournTimeCollector()]
+
+    def set_collectors(self, collectors: Iterable[Collector]) -> None:
+        self.collectors = list(collectors)
+        self.collector_handlers = get_collector_handlers(self.collectors)
+
+    def add_listener(self, action_type: ActionType, listener: ActionListener) -> None:
+        self.listeners[action_type].append(listener)
+
+    def remove_listener(self, action_type: ActionType, listener: ActionListener) -> None:
+        self.listeners[action_type].remove(listener)
+
     def start_action(self, item: I) -> None:
         self._item_in_hook(item)
         self.metrics.start_action_time = self.current_time
         item.history.append(ActionRecord(self, ActionType.IN, self.current_time))
+        self._notify(ActionType.IN, item)
 
     @abstractmethod
     def end_action(self) -> I:
@@ -74,6 +110,7 @@ class Node(ABC, SupportsDict, Generic[I, NM]):
 
     def reset_metrics(self) -> None:
         self.metrics.reset()
+        self.metrics.node_name = self.name
 
     def reset(self) -> None:
         self.current_time = 0
@@ -93,23 +130,44 @@ class Node(ABC, SupportsDict, Generic[I, NM]):
         return self.current_time + self._get_delay(**kwargs)
 
     def _end_action(self, item: I) -> I:
+        self._leave(item)
+        self._start_next_action(item)
+        return item
+
+    def _leave(self, item: I) -> None:
         self._item_out_hook(item)
         self.metrics.end_action_time = self.current_time
         item.history.append(ActionRecord(self, ActionType.OUT, self.current_time))
-        self._start_next_action(item)
-        return item
+        self._notify(ActionType.OUT, item)
 
     def _start_next_action(self, item: I) -> None:
         if self.next_node is None:
             item.processed = True
+            self._notify(ActionType.RELEASE, item)
         else:
             self.next_node.start_action(item)
 
-    def _item_in_hook(self, _: I) -> None:
+    def get_in_time(self, item: I) -> Optional[float]:
+        # Items stay in one node at a time, so the last record is the entrance into the current one
+        if item.history and item.history[-1].node is self and item.history[-1].action_type == ActionType.IN:
+            return item.history[-1].time
+        return None
+
+    def _notify(self, action_type: ActionType, item: I) -> None:
+        for listener in self.listeners[action_type]:
+            listener(self, item)
+
+    def _item_in_hook(self, item: I) -> None:
         self.metrics.num_in += 1
+        for handler in self.collector_handlers[CollectorEvent.ITEM_IN]:
+            handler(self, item)
 
-    def _item_out_hook(self, _: I) -> None:
+    def _item_out_hook(self, item: I) -> None:
         self.metrics.num_out += 1
+        for handler in self.collector_handlers[CollectorEvent.ITEM_OUT]:
+            handler(self, item)
 
     def _before_time_update_hook(self, time: float) -> None:
         self.metrics.passed_time += time - self.current_time
+        for handler in self.collector_handlers[CollectorEvent.TIME_UPDATE]:
+            handler(self, time)
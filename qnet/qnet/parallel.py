@@ -0,0 +1,292 @@
+import copy
+import heapq
+import random
+import itertools
+import multiprocessing
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Connection
+from typing import Callable, Mapping, Optional, Sequence, Any, cast
+
+from .common import INF_TIME, I, ActionRecord, reduce_metrics
+from .dist import GENERATOR
+from .node import Node, NodeMetrics
+from .transition import BaseTransitionNode
+from .model import Model, ModelMetrics
+from .spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec
+
+REMOTE_NODE_TYPE = 'remote'
+
+Message = tuple[float, str, Any]
+
+DEFAULT_MIN_DELAYS: dict[str, Callable[..., float]] = {
+    'constant': lambda value: value,
+    'uniform': lambda a, b: min(a, b),
+    'triangular': lambda low=0.0, high=1.0, mode=None: min(low, high),
+}
+
+
+class RemoteNode(Node[I, NodeMetrics]):
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(delay_fn=lambda: 0, **kwargs)
+        self.next_time = INF_TIME
+        self.outbox: list[Message] = []
+
+    def start_action(self, item: I) -> None:
+        # Node objects stay in their own process, so the history keeps only their names
+        for idx, record in enumerate(item.history):
+            if isinstance(record.node, Node):
+                item.history[idx] = ActionRecord(record.node.name, record.action_type, record.time)
+        self.outbox.append((self.current_time, self.name, item))
+
+    def end_action(self) -> I:
+        raise RuntimeError('Remote nodes never own items')
+
+    def reset(self) -> None:
+        super().reset()
+        self.next_time = INF_TIME
+        self.outbox.clear()
+
+
+@dataclass(frozen=True)
+class Partition:
+    spec: ModelSpec
+    names: tuple[str, ...]
+    feeders: tuple[str, ...]
+    lookahead: float
+
+
+@dataclass(eq=False)
+class ParallelResult:
+    model_metrics: ModelMetrics
+    nodes_metrics: list[NodeMetrics]
+    num_rounds: int
+    num_messages: int
+
+
+def get_min_delay(dist: Optional[DistSpec],
+                  min_delays: Mapping[str, Callable[..., float]] = DEFAULT_MIN_DELAYS) -> float:
+    if dist is None or dist.name not in min_delays:
+        return 0
+    return max(min_delays[dist.name](**dist.params), 0)
+
+
+def bind_generator(function: Callable[..., Any], generator: random.Random) -> Callable[..., Any]:
+    owner = getattr(function, '__self__', None)
+    if isinstance(owner, random.Random) and owner is not generator:
+        return cast(Callable[..., Any], getattr(generator, function.__name__))
+    return function
+
+
+def _get_targets(node_spec: NodeSpec) -> list[str]:
+    targets = [] if node_spec.next_node is None else [node_spec.next_node]
+    targets.extend(route.node for route in node_spec.routes if route.node is not None)
+    return targets
+
+
+def partition_spec(spec: ModelSpec,
+                   partitions: Sequence[Sequence[str]],
+                   builder: Optional[ModelBuilder] = None,
+                   min_delays: Mapping[str, Callable[..., float]] = DEFAULT_MIN_DELAYS) -> list[Partition]:
+    builder = ModelBuilder() if builder is None else builder
+    node_specs = {node_spec.name: node_spec for node_spec in spec.nodes}
+    owners: dict[str, int] = {}
+    for partition_idx, names in enumerate(partitions):
+        for name in names:
+            if name not in node_specs:
+                raise ValueError(f'Unknown node: "{name}"')
+            if name in owners:
+                raise ValueError(f'Node "{name}" is assigned to several partitions')
+            owners[name] = partition_idx
+    if missing := [name for name in node_specs if name not in owners]:
+        raise ValueError(f'Nodes are not assigned to any partition: {missing}')
+
+    for node_spec in spec.nodes:
+        for names in node_spec.links.values():
+            if any(owners[name] != owners[node_spec.name] for name in ([names] if isinstance(names, str) else names)):
+                raise ValueError(f'Links of "{node_spec.name}" must stay in its partition')
+    for initial in spec.initial:
+        if owners[initial.source] != owners[initial.node]:
+            raise ValueError(f'Initial item of "{initial.node}" must come from a factory of the same partition')
+
+    def is_inline(name: str) -> bool:
+        node_spec = node_specs[name]
+        return node_spec.delay is None and issubclass(builder.node_types[node_spec.type], BaseTransitionNode)
+
+    result: list[Partition] = []
+    for partition_idx, names in enumerate(partitions):
+        names = tuple(names)
+        remotes = dict.fromkeys(target for name in names for target in _get_targets(node_specs[name])
+                                if owners[target] != partition_idx)
+        sources = [name for name in names if any(target in remotes for target in _get_targets(node_specs[name]))]
+        # Zero-delay transitions forward items at the time they get them, so their inputs bound the send time
+        feeders: dict[str, None] = {}
+        visited = set(sources)
+        while sources:
+            name = sources.pop()
+            if not is_inline(name):
+                feeders[name] = None
+                continue
+            for other in names:
+                if other not in visited and name in _get_targets(node_specs[other]):
+                    visited.add(other)
+                    sources.append(other)
+        nodes = [node_specs[name] for name in names]
+        nodes.extend(NodeSpec(name=name, type=REMOTE_NODE_TYPE) for name in remotes)
+        initial = [initial for initial in spec.initial if owners[initial.node] == partition_idx]
+        result.append(
+            Partition(spec=replace(spec, nodes=tuple(nodes), evaluations=(), initial=tuple(initial)),
+                      names=names,
+                      feeders=tuple(feeders),
+                      lookahead=min((get_min_delay(node_specs[name].delay, min_delays) for name in feeders),
+                                    default=INF_TIME)))
+    return result
+
+
+class _PartitionRunner:
+
+    def __init__(self, builder: ModelBuilder, partition: Partition, generator: random.Random = GENERATOR) -> None:
+        builder = copy.copy(builder)
+        builder.node_types = {**builder.node_types, REMOTE_NODE_TYPE: RemoteNode}
+        # A pickled builder brings copies of the parent generator, so its samplers are bound to the partition stream
+        builder.functions = {name: bind_generator(function, generator) for name, function in builder.functions.items()}
+        self.model: Model[Any, ModelMetrics] = builder.build(partition.spec)
+        self.model.track_items = False
+        self.model.metrics.items.clear()
+        self.partition = partition
+        self.remotes = [node for node in self.model.topology.nodes if isinstance(node, RemoteNode)]
+        self.feeders = [self.model.nodes[name] for name in partition.feeders]
+        self.inbox: list[tuple[float, int, str, Any]] = []
+        self.counter = itertools.count()
+
+    @property
+    def next_time(self) -> float:
+        return min(self.model.next_time, self.inbox[0][0] if self.inbox else INF_TIME)
+
+    @property
+    def feeders_next_time(self) -> float:
+        return min((node.next_time for node in self.feeders), default=INF_TIME)
+
+    def run_window(self, end_time: float, messages: list[Message],
+                   inclusive: bool = False) -> tuple[list[Message], float, float]:
+        for time, name, item in messages:
+            heapq.heappush(self.inbox, (time, next(self.counter), name, item))
+        while (next_time := self.next_time) < end_time or inclusive and next_time <= end_time:
+            if self.inbox and self.inbox[0][0] <= next_time:
+                # Messages come first, so the receiver gets them before it handles its own events of that time
+                self.model.advance(next_time)
+                while self.inbox and self.inbox[0][0] <= next_time:
+                    _, _, name, item = heapq.heappop(self.inbox)
+                    self.model.nodes[name].start_action(item)
+            self.model.goto(next_time)
+        outbox: list[Message] = []
+        for node in self.remotes:
+            outbox.extend(node.outbox)
+            node.outbox.clear()
+        return outbox, self.next_time, self.feeders_next_time
+
+    def finish(self, end_time: float) -> tuple[ModelMetrics, dict[str, NodeMetrics]]:
+        if self.model.current_time < end_time:
+            self.model.goto(end_time)
+        return (self.model.metrics.state(),
+                {name: self.model.nodes[name].metrics.state() for name in self.partition.names})
+
+
+def _serve_partition(conn: Connection, builder: ModelBuilder, partition: Partition, seed: int) -> None:
+    try:
+        # Samplers that call the random module directly use the process generator, so it carries the partition stream
+        GENERATOR.setstate(random.Random(seed).getstate())
+        runner = _PartitionRunner(builder, partition, GENERATOR)
+        conn.send(('ready', (runner.next_time, runner.feeders_next_time)))
+        while True:
+            command, args = conn.recv()
+            if command == 'window':
+                conn.send(('ok', runner.run_window(*args)))
+            elif command == 'finish':
+                conn.send(('ok', runner.finish(*args)))
+                break
+    except Exception as error:  # pylint: disable=broad-except
+        conn.send(('error', error))
+    finally:
+        conn.close()
+
+
+def _receive(conn: Connection) -> Any:
+    status, payload = conn.recv()
+    if status == 'error':
+        raise payload
+    return payload
+
+
+def simulate_parallel(spec: ModelSpec,
+                      partitions: Sequence[Sequence[str]],
+                      end_time: float,
+                      builder: Optional[ModelBuilder] = None,
+                      seed: int = 0,
+                      min_delays: Mapping[str, Callable[..., float]] = DEFAULT_MIN_DELAYS,
+                      start_method: Optional[str] = None) -> ParallelResult:
+    # Partition i draws from its own stream seeded with seed + i, so results do not depend on the start method.
+    # The sequential engine interleaves one stream over all nodes, so the runs agree in distribution, not in value.
+    builder = ModelBuilder() if builder is None else builder
+    plan = partition_spec(spec, partitions, builder=builder, min_delays=min_delays)
+    context = multiprocessing.get_context(start_method)
+    conns: list[Connection] = []
+    processes = []
+    for idx, partition in enumerate(plan):
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_serve_partition, args=(child_conn, builder, partition, seed + idx))
+        process.start()
+        child_conn.close()
+        conns.append(parent_conn)
+        processes.append(process)
+    try:
+        owners = {name: idx for idx, partition in enumerate(plan) for name in partition.names}
+        states = [_receive(conn) for conn in conns]
+        pending: list[list[Message]] = [[] for _ in plan]
+        num_rounds = num_messages = 0
+        while (start_time := min(next_time for next_time, _ in states)) <= end_time:
+            # No partition can send earlier than its feeders finish, which bounds the windows of the others
+            send_times = [
+                min(feeders_time, start_time + partition.lookahead)
+                for (_, feeders_time), partition in zip(states, plan)
+            ]
+            receive_times = [
+                min((send_time for other_idx, send_time in enumerate(send_times) if other_idx != idx), default=INF_TIME)
+                for idx in range(len(plan))
+            ]
+            # Messages may still come at the time they are bounded by, so that time waits for the next round
+            windows = [(min(end_time, receive_time), receive_time > end_time) for receive_time in receive_times]
+            if all(next_time >= window_end and not (inclusive and next_time == window_end)
+                   for (next_time, _), (window_end, inclusive) in zip(states, windows)):
+                # Partitions that send each other messages at the same time can only take them in any order
+                windows = [(window_end, True) for window_end, _ in windows]
+            for conn, messages, (window_end, inclusive) in zip(conns, pending, windows):
+                conn.send(('window', (window_end, messages, inclusive)))
+            pending = [[] for _ in plan]
+            states = []
+            for conn in conns:
+                outbox, next_time, feeders_time = _receive(conn)
+                for message in outbox:
+                    pending[owners[message[1]]].append(message)
+                states.append((next_time, feeders_time))
+            for idx, messages in enumerate(pending):
+                if messages:
+                    states[idx] = (min(states[idx][0], *(message[0] for message in messages)), states[idx][1])
+                num_messages += len(messages)
+            num_rounds += 1
+        for conn in conns:
+            conn.send(('finish', (end_time, )))
+        results = [_receive(conn) for conn in conns]
+    finally:
+        for conn in conns:
+            conn.close()
+        for process in processes:
+            process.join()
+
+    model_metrics = reduce_metrics([model_metrics for model_metrics, _ in results])
+    model_metrics.passed_time = max(metrics.passed_time for metrics, _ in results)
+    nodes_states = {name: state for _, node_states in results for name, state in node_states.items()}
+    return ParallelResult(model_metrics=model_metrics,
+                          nodes_metrics=[nodes_states[name] for name in spec.node_names],
+                          num_rounds=num_rounds,
+                          num_messages=num_messages)
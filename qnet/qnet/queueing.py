@@ -1,9 +1,17 @@
 import itertools
+import functools
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Iterator, Iterable, Optional, Generic, ClassVar, TypeVar, Any
+from typing import Iterator, Iterable, Optional, Generic, ClassVar, TypeVar, Any, cast
 
-from .common import INF_TIME, TIME_EPS, I, T, SupportsDict, BoundedCollection, MinHeap
-from .node import Node, NodeMetrics
+from .common import (INF_TIME, TIME_EPS, I, T, SupportsDict, MergeRule, BoundedCollection, MinHeap, Queue,
+                     memoized_property, merge_rule)
+from .dist import constant
+from .node import Node, NodeMetrics, DelayFn
+from .collectors import (AggregateLoadCollector, Collector, CollectorEvent, IntervalsCollector, LoadCollector,
+                         WaitTimeCollector, WindowCollector)
+from .sketch import QuantileSketch
+from .window import SlidingWindow
 
 QM = TypeVar('QM', bound='QueueingMetrics')
 
@@ -12,34 +20,40 @@ QM = TypeVar('QM', bound='QueueingMetrics')
 class QueueingMetrics(NodeMetrics):
     total_wait_time: float = field(init=False, default=0)
     load_time_per_channel: dict[int, float] = field(init=False, default_factory=dict)
-    in_time: float = field(init=False, default=0)
-    out_time: float = field(init=False, default=0)
+    busy_time: float = field(init=False, default=0)
+    in_time: float = field(init=False, default=0, metadata=merge_rule(MergeRule.MAX))
+    out_time: float = field(init=False, default=0, metadata=merge_rule(MergeRule.MAX))
     in_intervals_sum: float = field(init=False, default=0)
     out_intervals_sum: float = field(init=False, default=0)
+    num_in_intervals: int = field(init=False, default=0)
+    num_out_intervals: int = field(init=False, default=0)
     num_failures: int = field(init=False, default=0)
+    occupancy_time: dict[int, float] = field(init=False, default_factory=dict)
+    wait_time_sketch: QuantileSketch = field(init=False, default_factory=QuantileSketch)
+    window: Optional[SlidingWindow] = field(default=None, metadata=merge_rule(MergeRule.DROP))
 
     @property
     def mean_in_interval(self) -> float:
-        return self.in_intervals_sum / max(self.num_in - 1, 1)
+        return self.in_intervals_sum / max(self.num_in_intervals, 1)
 
     @property
     def mean_out_interval(self) -> float:
-        return self.out_intervals_sum / max(self.num_out - 1, 1)
+        return self.out_intervals_sum / max(self.num_out_intervals, 1)
 
     @property
     def mean_queuelen(self) -> float:
         return self.total_wait_time / max(self.passed_time, TIME_EPS)
 
-    @property
+    @memoized_property
     def mean_load_per_channel(self) -> dict[int, float]:
         return {
             channel: load_time / max(self.passed_time, TIME_EPS)
             for channel, load_time in self.load_time_per_channel.items()
         }
 
-    @property
+    @memoized_property
     def mean_channels_load(self) -> float:
-        return sum(self.mean_load_per_channel.values())
+        return sum(self.mean_load_per_channel.values()) + self.busy_time / max(self.passed_time, TIME_EPS)
 
     @property
     def failure_proba(self) -> float:
@@ -49,13 +63,27 @@ class QueueingMetrics(NodeMetrics):
     def mean_wait_time(self) -> float:
         return self.total_wait_time / max(self.num_out, 1)
 
-    @property
+    @memoized_property
     def mean_load_time_per_channel(self) -> dict[int, float]:
         return {channel: load_time / max(self.num_out, 1) for channel, load_time in self.load_time_per_channel.items()}
 
-    @property
+    @memoized_property
     def mean_load_time(self) -> float:
-        return sum(self.mean_load_time_per_channel.values())
+        return sum(self.mean_load_time_per_channel.values()) + self.busy_time / max(self.num_out, 1)
+
+    def reset(self) -> None:
+        window = self.window
+        super().reset()
+        if window is not None:
+            window.reset()
+        self.window = window
+
+    def to_dict(self) -> dict[str, Any]:
+        metrics_dict = super().to_dict()
+        metrics_dict.update({f'wait_time_{name}': value for name, value in self.wait_time_sketch.to_dict().items()})
+        if self.window is not None:
+            metrics_dict.update({f'window_{name}': value for name, value in self.window.to_dict().items()})
+        return metrics_dict
 
 
 @dataclass(order=True, unsafe_hash=True)
@@ -73,6 +101,14 @@ class Task(SupportsDict, Generic[T]):
         return {'item': self.item, 'next_time': self.next_time}
 
 
+@dataclass(order=True, unsafe_hash=True)
+class BatchTask(Task[T]):
+    batch: list[T] = field(default_factory=list, repr=False, compare=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'batch': self.batch, 'next_time': self.next_time}
+
+
 @dataclass(eq=False)
 class Channel(SupportsDict, Generic[T]):
     id: int
@@ -86,7 +122,7 @@ class ChannelPool(SupportsDict, Generic[T]):
     def __init__(self, max_channels: Optional[int] = None) -> None:
         self.max_channels = max_channels
         self.tasks = MinHeap[Task[T]](maxlen=max_channels)
-        self.task_to_channel: dict[Task[T], Channel[T]] = {}
+        self.task_to_channel: dict[int, Channel[T]] = {}
         self.current_id: int = 0
         self.free_channels = {Channel[T](self.current_id)}
         self.occupied_channels: set[Channel[T]] = set()
@@ -122,11 +158,11 @@ class ChannelPool(SupportsDict, Generic[T]):
     def add_task(self, task: Task[T]) -> None:
         channel = self._occupy_channel()
         self.tasks.push(task)
-        self.task_to_channel[task] = channel
+        self.task_to_channel[task.id] = channel
 
     def pop_finished_task(self) -> Task[T]:
         task = self.tasks.pop()
-        self._free_channel(self.task_to_channel[task])
+        self._free_channel(self.task_to_channel.pop(task.id))
         return task
 
     def to_dict(self) -> dict[str, Any]:
@@ -154,7 +190,75 @@ class ChannelPool(SupportsDict, Generic[T]):
         self.occupied_channels.remove(channel)
 
 
+class FIFOChannelPool(ChannelPool[T]):
+
+    def __init__(self, max_channels: Optional[int] = None) -> None:
+        super().__init__(max_channels=max_channels)
+        # Tasks finish in the order they start, so a deque replaces the heap and channels are kept alongside tasks
+        self.tasks = Queue[Task[T]]()  # type: ignore[assignment]
+        self.channels: deque[Channel[T]] = deque()
+
+    @property
+    def next_finish_time(self) -> float:
+        return self.tasks.queue[0].next_time if self.tasks.queue else INF_TIME
+
+    def clear(self) -> None:
+        super().clear()
+        self.channels.clear()
+
+    def add_task(self, task: Task[T]) -> None:
+        channel = self._occupy_channel()
+        tasks = self.tasks.queue
+        if not tasks or tasks[-1].next_time <= task.next_time:
+            tasks.append(task)
+            self.channels.append(channel)
+            return
+        # Tasks added with explicit times may break the order, so they are inserted after the last earlier task
+        idx = len(tasks) - 1
+        while idx > 0 and tasks[idx - 1].next_time > task.next_time:
+            idx -= 1
+        tasks.insert(idx, task)
+        self.channels.insert(idx, channel)
+
+    def pop_finished_task(self) -> Task[T]:
+        self._free_channel(self.channels.popleft())
+        return self.tasks.pop()
+
+
+def is_fifo_completion(delay_fn: DelayFn, max_channels: Optional[int]) -> bool:
+    return max_channels == 1 or isinstance(delay_fn, functools.partial) and delay_fn.func is constant
+
+
+class AggregateChannelPool(ChannelPool[T]):
+
+    def __init__(self, max_channels: Optional[int] = None) -> None:  # pylint: disable=super-init-not-called
+        # Channels are interchangeable, so only the heap of completion times is kept
+        self.max_channels = max_channels
+        self.tasks = MinHeap[Task[T]](maxlen=max_channels)
+
+    @property
+    def num_occupied_channels(self) -> int:
+        return len(self.tasks)
+
+    @property
+    def occupied_channels(self) -> set[Channel[T]]:
+        raise AttributeError('Aggregate channel pools do not track channels')
+
+    def clear(self) -> None:
+        self.tasks.clear()
+
+    def add_task(self, task: Task[T]) -> None:
+        self.tasks.push(task)
+
+    def pop_finished_task(self) -> Task[T]:
+        return self.tasks.pop()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'max_channels': self.max_channels, 'num_active_tasks': self.num_active_tasks}
+
+
 class QueueingNode(Node[I, QM]):
+    channel_pool_type: ClassVar[type[ChannelPool]] = ChannelPool
 
     def __init__(self, queue: BoundedCollection[I], channel_pool: ChannelPool[I], **kwargs: Any) -> None:
         super().__init__(**kwargs)
@@ -166,6 +270,12 @@ class QueueingNode(Node[I, QM]):
     def current_items(self) -> Iterable[I]:
         return itertools.chain(self.queue.data, (task.item for task in self.channel_pool.tasks.data))
 
+    def default_collectors(self) -> list[Collector]:
+        collectors = [*super().default_collectors(), IntervalsCollector(), LoadCollector(), WaitTimeCollector()]
+        if self.metrics.window is not None:
+            collectors.append(WindowCollector())
+        return collectors
+
     @property
     def num_tasks(self) -> int:
         return self.channel_pool.num_active_tasks
@@ -206,6 +316,13 @@ class QueueingNode(Node[I, QM]):
         self.channel_pool.add_task(task)
         self.next_time = self._predict_next_time()
 
+    def jockey(self, node: Node[I, NodeMetrics]) -> I:
+        # The item leaves through the usual out path, so both nodes keep consistent counts and times
+        item = self.queue.pop()
+        self._leave(item)
+        node.start_action(item)
+        return item
+
     def to_dict(self) -> dict[str, Any]:
         node_dict = super().to_dict()
         node_dict.update({
@@ -221,28 +338,111 @@ class QueueingNode(Node[I, QM]):
     def _predict_next_time(self, **_: Any) -> float:
         return self.channel_pool.next_finish_time
 
-    def _before_time_update_hook(self, time: float) -> None:
-        super()._before_time_update_hook(time)
-        dtime = time - self.current_time
-        for channel in self.channel_pool.occupied_channels:
-            self.metrics.load_time_per_channel[channel.id] = self.metrics.load_time_per_channel.get(channel.id,
-                                                                                                    0) + dtime
-        self.metrics.total_wait_time += self.queuelen * dtime
-
-    def _item_out_hook(self, item: I) -> None:
-        super()._item_out_hook(item)
-        if self.metrics.num_out > 1:
-            self.metrics.out_intervals_sum += self.current_time - self.metrics.out_time
-        self.metrics.out_time = self.current_time
-
-    def _item_in_hook(self, item: I) -> None:
-        super()._item_in_hook(item)
-        if self.metrics.num_in > 1:
-            self.metrics.in_intervals_sum += self.current_time - self.metrics.in_time
-        self.metrics.in_time = self.current_time
-
-    def _before_add_task_hook(self, _: Task[I]) -> None:
-        pass
+    def _before_add_task_hook(self, task: Task[I]) -> None:
+        for handler in self.collector_handlers[CollectorEvent.TASK_START]:
+            handler(self, task)
 
     def _failure_hook(self) -> None:
         self.metrics.num_failures += 1
+        for handler in self.collector_handlers[CollectorEvent.FAILURE]:
+            handler(self)
+
+
+class AggregateQueueingNode(QueueingNode[I, QM]):
+    channel_pool_type = AggregateChannelPool
+
+    def __init__(self,
+                 queue: Optional[BoundedCollection[I]] = None,
+                 channel_pool: Optional[AggregateChannelPool[I]] = None,
+                 **kwargs: Any) -> None:
+        super().__init__(queue=Queue[I]() if queue is None else queue,
+                         channel_pool=AggregateChannelPool[I]() if channel_pool is None else channel_pool,
+                         **kwargs)
+
+    @property
+    def current_items(self) -> Iterable[I]:
+        # Items are stamped when they are read or leave, so a time update does not touch every item in service.
+        # References to them kept elsewhere (e.g. by the model) see the time of the last stamp until then.
+        for item in super().current_items:
+            item.current_time = self.current_time
+            yield item
+
+    @property
+    def tracked_items(self) -> Iterable[I]:
+        # Items in service were seen by the model before they entered, so only the queue is scanned on each step
+        return self.queue.data
+
+    def set_collectors(self, collectors: Iterable[Collector]) -> None:
+        # Channels are not tracked, so their loads are collected as the total busy time
+        super().set_collectors(
+            AggregateLoadCollector() if isinstance(collector, LoadCollector) else collector for collector in collectors)
+
+    def update_time(self, time: float) -> None:
+        self._before_time_update_hook(time)
+        self.current_time = time
+
+    def _leave(self, item: I) -> None:
+        item.current_time = self.current_time
+        super()._leave(item)
+
+
+class BulkQueueingNode(QueueingNode[I, QM]):
+
+    def __init__(self, max_batch: int, min_batch: int = 1, **kwargs: Any) -> None:
+        if not 1 <= min_batch <= max_batch:
+            raise ValueError(f'Batch bounds must satisfy 1 <= min_batch <= max_batch. Given: {min_batch}, {max_batch}')
+        super().__init__(**kwargs)
+        self.max_batch = max_batch
+        self.min_batch = min_batch
+
+    @property
+    def current_items(self) -> Iterable[I]:
+        return itertools.chain(self.queue.data,
+                               (item for task in self.channel_pool.tasks.data for item in self._get_batch(task)))
+
+    def start_action(self, item: I) -> None:
+        Node.start_action(self, item)
+        # A free channel means fewer than min_batch items wait, so they all fit into one batch with the new item
+        if not self.channel_pool.is_occupied and len(self.queue) + 1 >= self.min_batch:
+            self._start_batch([*self._pop_items(len(self.queue)), item])
+        elif self.queue.is_full:
+            self._failure_hook()
+        else:
+            self.queue.push(item)
+
+    def end_action(self) -> I:
+        batch = self._get_batch(self.channel_pool.pop_finished_task())
+        if len(self.queue) >= self.min_batch:
+            self._start_batch(self._pop_items(min(len(self.queue), self.max_batch)))
+        else:
+            self.next_time = self._predict_next_time()
+        for item in batch:
+            self._end_action(item)
+        return batch[-1]
+
+    def add_task(self, task: Task[I]) -> None:
+        # Tasks of different classes are not comparable, so single items added from outside become batches
+        if not isinstance(task, BatchTask):
+            task = BatchTask[I](item=task.item, next_time=task.next_time, batch=[task.item])
+        super().add_task(task)
+
+    def to_dict(self) -> dict[str, Any]:
+        node_dict = super().to_dict()
+        node_dict.update({'max_batch': self.max_batch, 'min_batch': self.min_batch})
+        return node_dict
+
+    def _pop_items(self, num_items: int) -> list[I]:
+        return [self.queue.pop() for _ in range(num_items)]
+
+    def _start_batch(self, batch: list[I]) -> None:
+        next_time = self._predict_item_time(item=batch[0], batch=batch)
+        self.add_task(BatchTask[I](item=batch[0], next_time=next_time, batch=batch))
+
+    @staticmethod
+    def _get_batch(task: Task[I]) -> list[I]:
+        return cast(BatchTask[I], task).batch
+
+    def _before_add_task_hook(self, task: Task[I]) -> None:
+        # Collectors see one task per item, so waiting times are recorded for every item of the batch
+        for item in self._get_batch(task):
+            super()._before_add_task_hook(task if item is task.item else Task[I](item=item, next_time=task.next_time))
@@ -0,0 +1,126 @@
+import math
+import statistics
+import contextlib
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping, Optional, Any
+
+from .cache import MetricVector, ResultCache
+from .experiment import ModelFactory, RunSettings, run_replication
+from .sweep import ParamsGrid, expand_grid
+
+
+@dataclass(eq=False)
+class SelectionResult:
+    configs: list[dict[str, Any]]
+    best_idx: int
+    means: list[float]
+    num_runs: list[int]
+    eliminated_at: list[Optional[int]]
+
+    @property
+    def best(self) -> dict[str, Any]:
+        return self.configs[self.best_idx]
+
+    @property
+    def total_runs(self) -> int:
+        return sum(self.num_runs)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'best': self.best,
+            'configs': self.configs,
+            'means': self.means,
+            'num_runs': self.num_runs,
+            'eliminated_at': self.eliminated_at,
+        }
+
+
+def get_kn_constant(num_configs: int, num_initial_runs: int, alpha: float) -> float:
+    # Kim and Nelson (2001), h^2 for the fully sequential procedure
+    eta = ((2 * alpha / (num_configs - 1))**(-2 / (num_initial_runs - 1)) - 1) / 2
+    return 2 * eta * (num_initial_runs - 1)
+
+
+def select_best(factory: ModelFactory,
+                params: ParamsGrid,
+                settings: RunSettings,
+                metric: str,
+                indifference: float,
+                alpha: float = 0.05,
+                num_initial_runs: int = 10,
+                minimize: bool = True,
+                base_params: Optional[Mapping[str, Any]] = None,
+                seed: int = 0,
+                n_jobs: int = 1,
+                cache: Optional[ResultCache] = None,
+                max_runs: Optional[int] = None) -> SelectionResult:
+    assert indifference > 0 and 0 < alpha < 1 and num_initial_runs >= 2, (indifference, alpha, num_initial_runs)
+    assert max_runs is None or max_runs >= num_initial_runs, (max_runs, num_initial_runs)
+    configs = [{**(base_params or {}), **config} for config in expand_grid(params)]
+    num_configs = len(configs)
+    sign = -1 if minimize else 1
+    values: list[list[float]] = [[] for _ in configs]
+    eliminated_at: list[Optional[int]] = [None] * num_configs
+
+    with contextlib.ExitStack() as stack:
+        executor = None if n_jobs == 1 else stack.enter_context(
+            ProcessPoolExecutor(max_workers=None if n_jobs < 0 else n_jobs))
+
+        def run_stage(indices: list[int], run_idx: int) -> None:
+            # Replications with the same index share the seed, so the configurations use common random numbers
+            args = [(factory, configs[idx], settings, seed + run_idx, cache) for idx in indices]
+            if executor is None or len(indices) <= 1:
+                results: list[MetricVector] = [run_replication(*task_args) for task_args in args]
+            else:
+                results = list(executor.map(run_replication, *zip(*args)))
+            for idx, metrics in zip(indices, results):
+                values[idx].append(sign * metrics[metric])
+
+        survivors = list(range(num_configs))
+        for run_idx in range(num_initial_runs):
+            run_stage(survivors, run_idx)
+        if num_configs > 1:
+            h_sq = get_kn_constant(num_configs, num_initial_runs, alpha)
+            initial = [config_values[:num_initial_runs] for config_values in values]
+            variances = {
+                (idx, other): statistics.variance([value - other for value, other in zip(initial[idx], initial[other])])
+                for idx in survivors for other in survivors if idx != other
+            }
+            # The continuation region closes after this many runs, and ties are never eliminated inside it
+            last_run = max(num_initial_runs, *(math.floor(h_sq * variance / indifference**2) + 1
+                                               for variance in variances.values()))
+            if max_runs is not None:
+                last_run = min(last_run, max_runs)
+            num_runs = num_initial_runs
+            while len(survivors) > 1:
+                means = {idx: math.fsum(values[idx]) / num_runs for idx in survivors}
+                if num_runs >= last_run:
+                    best_idx = max(survivors, key=lambda idx: (means[idx], -idx))
+                    for idx in survivors:
+                        if idx != best_idx:
+                            eliminated_at[idx] = num_runs
+                    survivors = [best_idx]
+                    break
+                # The continuation region shrinks linearly, so every pair is decided after finitely many runs
+                widths = {
+                    pair: max(0, indifference / (2 * num_runs) * (h_sq * variance / indifference**2 - num_runs))
+                    for pair, variance in variances.items()
+                }
+                eliminated = [
+                    idx for idx in survivors
+                    if any(means[idx] < means[other] - widths[idx, other] for other in survivors if other != idx)
+                ]
+                for idx in eliminated:
+                    eliminated_at[idx] = num_runs
+                survivors = [idx for idx in survivors if idx not in eliminated]
+                if len(survivors) > 1:
+                    run_stage(survivors, num_runs)
+                    num_runs += 1
+
+    means = [sign * math.fsum(config_values) / len(config_values) for config_values in values]
+    return SelectionResult(configs=configs,
+                           best_idx=survivors[0],
+                           means=means,
+                           num_runs=[len(config_values) for config_values in values],
+                           eliminated_at=eliminated_at)
@@ -0,0 +1,132 @@
+import random
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Mapping, Optional, Sequence, Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .cache import to_metric_vector
+from .experiment import ModelFactory, RunSettings, gather_metrics, run_model, sample_metrics
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    name: str
+    shape: tuple[int, ...]
+    dtype: str = 'float64'
+
+
+class SharedArray:
+
+    def __init__(self, shape: Sequence[int], names: Sequence[str], dtype: str = 'float64') -> None:
+        self.names = list(names)
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.spec = SharedArraySpec(name=self.shm.name, shape=tuple(shape), dtype=dtype)
+        self.array: npt.NDArray = np.ndarray(self.spec.shape, dtype=dtype, buffer=self.shm.buf)
+        self.array.fill(np.nan)
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(spec: SharedArraySpec) -> tuple[shared_memory.SharedMemory, npt.NDArray]:
+    # Pool workers share the parent's resource tracker, so the parent stays the only owner of the block
+    shm = shared_memory.SharedMemory(name=spec.name)
+    return shm, np.ndarray(spec.shape, dtype=spec.dtype, buffer=shm.buf)
+
+
+def _write_row(row: npt.NDArray, names: Sequence[str], metrics: Mapping[str, Any]) -> None:
+    vector = to_metric_vector(metrics)
+    row[:] = [vector.get(name, np.nan) for name in names]
+
+
+def _run_into(spec: SharedArraySpec, idx: int, names: Sequence[str], factory: ModelFactory, params: Mapping[str, Any],
+              settings: RunSettings, seed: int) -> int:
+    shm, array = _attach(spec)
+    try:
+        random.seed(seed)
+        _write_row(array[idx], names, run_model(factory(**params), settings))
+    finally:
+        del array
+        shm.close()
+    return idx
+
+
+def _sample_into(spec: SharedArraySpec, idx: int, names: Sequence[str], factory: ModelFactory,
+                 params: Mapping[str, Any], start_time: float, end_time: float, step_time: float, seed: int) -> int:
+    shm, array = _attach(spec)
+    try:
+        random.seed(seed)
+        samples = sample_metrics(factory(**params), start_time, end_time, step_time)
+        for step, metrics in enumerate(samples):
+            _write_row(array[idx, step], names, metrics)
+    finally:
+        del array
+        shm.close()
+    return idx
+
+
+def probe_metric_names(factory: ModelFactory, params: Mapping[str, Any], seed: int = 0) -> list[str]:
+    state = random.getstate()
+    try:
+        random.seed(seed)
+        return list(to_metric_vector(gather_metrics(factory(**params))))
+    finally:
+        random.setstate(state)
+
+
+def _execute(tasks: Iterable[tuple[Any, ...]], n_jobs: int) -> None:
+    with ProcessPoolExecutor(max_workers=None if n_jobs < 0 else n_jobs) as executor:
+        futures = [executor.submit(*task) for task in tasks]
+        for future in futures:
+            future.result()
+
+
+def replicate_shared(factory: ModelFactory,
+                     params: Mapping[str, Any],
+                     settings: RunSettings,
+                     num_runs: int,
+                     seed: int = 0,
+                     n_jobs: int = -1,
+                     metric_names: Optional[Sequence[str]] = None) -> SharedArray:
+    names = probe_metric_names(factory, params, seed) if metric_names is None else list(metric_names)
+    result = SharedArray(shape=(num_runs, len(names)), names=names)
+    try:
+        _execute(((_run_into, result.spec, idx, names, factory, params, settings, seed + idx)
+                  for idx in range(num_runs)), n_jobs)
+    except BaseException:
+        result.close()
+        raise
+    return result
+
+
+def sample_shared(factory: ModelFactory,
+                  params: Mapping[str, Any],
+                  start_time: float,
+                  end_time: float,
+                  step_time: float,
+                  num_runs: int,
+                  seed: int = 0,
+                  n_jobs: int = -1,
+                  metric_names: Optional[Sequence[str]] = None) -> SharedArray:
+    names = probe_metric_names(factory, params, seed) if metric_names is None else list(metric_names)
+    num_steps = int((end_time - start_time) // step_time)
+    result = SharedArray(shape=(num_runs, num_steps, len(names)), names=names)
+    try:
+        _execute(((_sample_into, result.spec, idx, names, factory, params, start_time, end_time, step_time, seed + idx)
+                  for idx in range(num_runs)), n_jobs)
+    except BaseException:
+        result.close()
+        raise
+    return result
@@ -0,0 +1,92 @@
+import math
+import bisect
+from typing import Sequence, Any
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+
+    def __init__(self, relative_accuracy: float = 0.01, max_num_buckets: int = 2048, min_value: float = 1e-9) -> None:
+        assert 0 < relative_accuracy < 1, relative_accuracy
+        self.relative_accuracy = relative_accuracy
+        self.max_num_buckets = max_num_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.num_zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.total / max(self.count, 1)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= self.min_value:
+            self.num_zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_num_buckets:
+            self._collapse()
+
+    def quantile(self, proba: float) -> float:
+        if self.count == 0:
+            return math.nan
+        rank = proba * (self.count - 1)
+        seen = self.num_zeros
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return min(max(self._get_value(key), self.min), self.max)
+        return self.max
+
+    def histogram(self, bin_edges: Sequence[float]) -> list[int]:
+        counts = [0] * (len(bin_edges) - 1)
+        values = [(0.0, self.num_zeros), *((self._get_value(key), count) for key, count in self.buckets.items())]
+        for value, count in values:
+            value = min(max(value, self.min), self.max)
+            idx = bisect.bisect_right(bin_edges, value) - 1
+            # The last bin is closed on the right
+            if idx == len(counts) and value == bin_edges[-1]:
+                idx -= 1
+            if 0 <= idx < len(counts):
+                counts[idx] += count
+        return counts
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        assert self.gamma == other.gamma, 'Sketches must have the same accuracy'
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.num_zeros += other.num_zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_num_buckets:
+            self._collapse()
+        return self
+
+    def to_dict(self, quantiles: Sequence[float] = QUANTILES) -> dict[str, Any]:
+        return {f'p{round(proba * 100):02d}': self.quantile(proba) for proba in quantiles}
+
+    def _get_value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def _collapse(self) -> None:
+        # Lowest buckets are merged first, so the accuracy of the upper quantiles is preserved
+        keys = sorted(self.buckets)
+        num_extra = len(keys) - self.max_num_buckets
+        target = keys[num_extra]
+        for key in keys[:num_extra]:
+            self.buckets[target] += self.buckets.pop(key)
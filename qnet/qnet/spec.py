@@ -0,0 +1,293 @@
+import json
+import random
+import hashlib
+import functools
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Generic, Mapping, Optional, Sequence, Union, Any, cast
+
+from .common import I, Queue, LIFOQueue, PriorityQueue, BoundedCollection
+from .dist import constant, erlang
+from .node import Node, NodeMetrics, DelayFn
+from .factory import BaseFactoryNode, FactoryNode
+from .queueing import (AggregateQueueingNode, BulkQueueingNode, ChannelPool, FIFOChannelPool, QueueingMetrics,
+                       QueueingNode, Task, is_fifo_completion)
+from .transition import ProbaTransitionNode, ShortestQueueTransitionNode
+from .window import SlidingWindow
+from .collectors import (Collector, IntervalsCollector, LoadCollector, OccupancyCollector, SojournTimeCollector,
+                         WaitTimeCollector, WindowCollector)
+from .model import Evaluation, Model, ModelMetrics, Nodes
+from .logger import BaseLogger, CLILogger
+
+DEFAULT_NODE_TYPES: dict[str, type[Node]] = {
+    'factory': FactoryNode,
+    'queueing': QueueingNode,
+    'aggregate_queueing': AggregateQueueingNode,
+    'infinite_server': AggregateQueueingNode,
+    'bulk_queueing': BulkQueueingNode,
+    'proba_transition': ProbaTransitionNode,
+    'shortest_queue': ShortestQueueTransitionNode,
+}
+
+DEFAULT_METRICS_TYPES: dict[str, type] = {
+    'node': NodeMetrics,
+    'queueing': QueueingMetrics,
+    'model': ModelMetrics,
+}
+
+DEFAULT_COLLECTOR_TYPES: dict[str, type[Collector]] = {
+    'sojourn_time': SojournTimeCollector,
+    'intervals': IntervalsCollector,
+    'load': LoadCollector,
+    'wait_time': WaitTimeCollector,
+    'window': WindowCollector,
+    'occupancy': OccupancyCollector,
+}
+
+DEFAULT_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    'constant': constant,
+    'exponential': random.expovariate,
+    'erlang': erlang,
+    'uniform': random.uniform,
+    'randint': random.randint,
+    'normal': random.normalvariate,
+    'triangular': random.triangular,
+}
+
+
+@dataclass(frozen=True)
+class DistSpec:
+    name: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class QueueSpec:
+    kind: str = 'fifo'
+    maxlen: Optional[int] = None
+    priority: Optional[str] = None
+    fifo: Optional[bool] = None
+
+
+@dataclass(frozen=True)
+class RouteSpec:
+    node: Optional[str]
+    proba: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class NodeSpec:
+    name: str
+    type: str
+    delay: Optional[DistSpec] = None
+    metrics: Optional[str] = None
+    queue: Optional[QueueSpec] = None
+    channels: Optional[int] = None
+    next_node: Optional[str] = None
+    routes: tuple[RouteSpec, ...] = ()
+    links: Mapping[str, Union[str, Sequence[str]]] = field(default_factory=dict)
+    options: Mapping[str, Any] = field(default_factory=dict)
+    next_time: Optional[float] = None
+    window: Optional[float] = None
+    collectors: Optional[tuple[str, ...]] = None
+    fifo_completion: Optional[bool] = None
+    batch: Optional[DistSpec] = None
+
+
+@dataclass(frozen=True)
+class InitialSpec:
+    node: str
+    source: str
+    next_time: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    nodes: tuple[NodeSpec, ...]
+    metrics: str = 'model'
+    evaluations: tuple[str, ...] = ()
+    initial: tuple[InitialSpec, ...] = ()
+    track_items: bool = True
+
+    def __hash__(self) -> int:
+        return int(self.key()[:16], 16)
+
+    @property
+    def node_names(self) -> list[str]:
+        return [node.name for node in self.nodes]
+
+    def key(self) -> str:
+        payload = json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(spec_dict: Mapping[str, Any]) -> 'ModelSpec':
+        nodes: list[NodeSpec] = []
+        for node_dict in spec_dict['nodes']:
+            node_dict = dict(node_dict)
+            if node_dict.get('delay') is not None:
+                node_dict['delay'] = DistSpec(**node_dict['delay'])
+            if node_dict.get('batch') is not None:
+                node_dict['batch'] = DistSpec(**node_dict['batch'])
+            if node_dict.get('queue') is not None:
+                node_dict['queue'] = QueueSpec(**node_dict['queue'])
+            node_dict['routes'] = tuple(RouteSpec(**route) for route in node_dict.get('routes', ()))
+            if node_dict.get('collectors') is not None:
+                node_dict['collectors'] = tuple(node_dict['collectors'])
+            nodes.append(NodeSpec(**node_dict))
+        return ModelSpec(nodes=tuple(nodes),
+                         metrics=spec_dict.get('metrics', 'model'),
+                         evaluations=tuple(spec_dict.get('evaluations', ())),
+                         initial=tuple(InitialSpec(**initial) for initial in spec_dict.get('initial', ())),
+                         track_items=spec_dict.get('track_items', True))
+
+
+def diff_specs(old: ModelSpec, new: ModelSpec) -> dict[str, tuple[Any, Any]]:
+    diff: dict[str, tuple[Any, Any]] = {}
+
+    def compare(path: str, old_value: Any, new_value: Any) -> None:
+        if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+            for key in dict.fromkeys([*old_value, *new_value]):
+                compare(f'{path}.{key}' if path else str(key), old_value.get(key), new_value.get(key))
+        elif old_value != new_value:
+            diff[path] = (old_value, new_value)
+
+    old_dict, new_dict = old.to_dict(), new.to_dict()
+    for spec_dict in (old_dict, new_dict):
+        spec_dict['nodes'] = {node['name']: node for node in spec_dict['nodes']}
+    compare('', old_dict, new_dict)
+    return diff
+
+
+class ModelBuilder(Generic[I]):
+
+    def __init__(self,
+                 node_types: Optional[Mapping[str, type[Node]]] = None,
+                 metrics_types: Optional[Mapping[str, type]] = None,
+                 functions: Optional[Mapping[str, Callable[..., Any]]] = None,
+                 logger_type: Callable[[], BaseLogger[I]] = CLILogger,
+                 collector_types: Optional[Mapping[str, type[Collector]]] = None) -> None:
+        self.node_types = {**DEFAULT_NODE_TYPES, **(node_types or {})}
+        self.metrics_types = {**DEFAULT_METRICS_TYPES, **(metrics_types or {})}
+        self.functions = {**DEFAULT_FUNCTIONS, **(functions or {})}
+        self.logger_type = logger_type
+        self.collector_types = {**DEFAULT_COLLECTOR_TYPES, **(collector_types or {})}
+
+    def __call__(self, spec: ModelSpec) -> Model[I, ModelMetrics]:
+        return self.build(spec)
+
+    def to_dict(self) -> dict[str, Any]:
+        registries = {
+            'node_types': self.node_types,
+            'metrics_types': self.metrics_types,
+            'functions': self.functions,
+            'collector_types': self.collector_types,
+        }
+        builder_dict: dict[str, Any] = {
+            name: {key: f'{value.__module__}.{value.__qualname__}' for key, value in registry.items()}
+            for name, registry in registries.items()
+        }
+        builder_dict['logger_type'] = f'{self.logger_type.__module__}.{self.logger_type.__qualname__}'
+        return builder_dict
+
+    def build(self, spec: ModelSpec) -> Model[I, ModelMetrics]:
+        nodes = Nodes[I]()
+        for node_spec in spec.nodes:
+            if node_spec.name in nodes:
+                raise ValueError(f'Nodes must have different names. Duplicate: "{node_spec.name}"')
+            nodes[node_spec.name] = self._build_node(node_spec)
+
+        for node_spec in spec.nodes:
+            self._connect_node(node_spec, nodes)
+        for initial in spec.initial:
+            self._add_initial_item(initial, nodes)
+
+        evaluations = [Evaluation[Any](name=name, evaluate=self.functions[name]) for name in spec.evaluations]
+        return Model(nodes=nodes,
+                     logger=self.logger_type(),
+                     metrics=self.metrics_types[spec.metrics](),
+                     evaluations=evaluations,
+                     track_items=spec.track_items)
+
+    def _build_delay(self, dist: Optional[DistSpec]) -> Optional[DelayFn]:
+        if dist is None:
+            return None
+        return functools.partial(self.functions[dist.name], **dist.params)
+
+    def _build_queue(self, queue: Optional[QueueSpec]) -> BoundedCollection[I]:
+        if queue is None:
+            return Queue[I]()
+        if queue.kind == 'fifo':
+            return Queue[I](maxlen=queue.maxlen)
+        if queue.kind == 'lifo':
+            return LIFOQueue[I](maxlen=queue.maxlen)
+        if queue.kind == 'priority':
+            if queue.priority is None:
+                raise ValueError('Priority queue requires a priority function')
+            return PriorityQueue[I](priority_fn=self.functions[queue.priority], fifo=queue.fifo, maxlen=queue.maxlen)
+        raise ValueError(f'Unknown queue kind: "{queue.kind}"')
+
+    def _build_node(self, node_spec: NodeSpec) -> Node[I, NodeMetrics]:
+        node_type = self.node_types[node_spec.type]
+        is_queueing = issubclass(node_type, QueueingNode)
+        metrics_name = node_spec.metrics or ('queueing' if is_queueing else 'node')
+        metrics_kwargs = {} if node_spec.window is None else {'window': SlidingWindow(node_spec.window)}
+        kwargs: dict[str, Any] = {'name': node_spec.name, 'metrics': self.metrics_types[metrics_name](**metrics_kwargs)}
+        if (delay_fn := self._build_delay(node_spec.delay)) is not None:
+            kwargs['delay_fn'] = delay_fn
+        if (batch_size_fn := self._build_delay(node_spec.batch)) is not None:
+            kwargs['batch_size_fn'] = batch_size_fn
+        if node_spec.collectors is not None:
+            collectors = [self.collector_types[name]() for name in node_spec.collectors]
+            if node_spec.window is None and any(isinstance(collector, WindowCollector) for collector in collectors):
+                raise ValueError(f'Node "{node_spec.name}" must have a window to use the window collector')
+            kwargs['collectors'] = collectors
+        if is_queueing:
+            kwargs['queue'] = self._build_queue(node_spec.queue)
+            kwargs['channel_pool'] = self._get_channel_pool_type(node_type, node_spec, delay_fn)(
+                max_channels=node_spec.channels)
+        return node_type(**kwargs, **node_spec.options)
+
+    @staticmethod
+    def _get_channel_pool_type(node_type: type[QueueingNode], node_spec: NodeSpec,
+                               delay_fn: Optional[DelayFn]) -> type[ChannelPool]:
+        if node_type.channel_pool_type is not ChannelPool:
+            if node_spec.fifo_completion:
+                raise ValueError(f'Node "{node_spec.name}" can not use FIFO completion with '
+                                 f'{node_type.channel_pool_type.__name__}')
+            return node_type.channel_pool_type
+        if node_spec.fifo_completion is False:
+            return ChannelPool
+        # Delays built here are partials of the registered functions, so dist.constant is recognised whatever its value
+        if node_spec.fifo_completion or delay_fn is not None and is_fifo_completion(delay_fn, node_spec.channels):
+            return FIFOChannelPool
+        return ChannelPool
+
+    def _connect_node(self, node_spec: NodeSpec, nodes: Nodes[I]) -> None:
+        node = nodes[node_spec.name]
+        if node_spec.next_node is not None:
+            node.set_next_node(nodes[node_spec.next_node])
+        if node_spec.routes:
+            if not isinstance(node, ProbaTransitionNode):
+                raise ValueError(f'Node "{node_spec.name}" does not support probability routes')
+            for route in node_spec.routes:
+                target = None if route.node is None else nodes[route.node]
+                node.add_next_node(target, proba=node.rest_proba if route.proba is None else route.proba)
+        for attr, names in node_spec.links.items():
+            setattr(node, attr, nodes[names] if isinstance(names, str) else [nodes[name] for name in names])
+        if node_spec.next_time is not None:
+            node.next_time = node_spec.next_time
+
+    def _add_initial_item(self, initial: InitialSpec, nodes: Nodes[I]) -> None:
+        source, node = nodes[initial.source], nodes[initial.node]
+        if not isinstance(source, BaseFactoryNode):
+            raise ValueError(f'Initial items must be created by a factory node. Given: "{initial.source}"')
+        if not isinstance(node, QueueingNode):
+            raise ValueError(f'Initial items can be added only to queueing nodes. Given: "{initial.node}"')
+        item = cast(I, source._get_next_item())
+        if initial.next_time is None:
+            node.queue.push(item)
+        else:
+            node.add_task(Task[I](item=item, next_time=initial.next_time))
@@ -0,0 +1,172 @@
+import math
+import random
+from dataclasses import dataclass, asdict
+from typing import Callable, Mapping, Optional, Any
+
+from .common import INF_TIME
+from .queueing import QueueingNode
+from .model import Model
+from .experiment import ModelFactory
+from .stats import ConfidenceInterval, mean_confidence_interval
+
+
+@dataclass(frozen=True)
+class SplittingSettings:
+    node: str
+    crude_time: float
+    effort: int = 100
+    levels: Optional[tuple[int, ...]] = None
+    base_level: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(eq=False)
+class SplittingEstimate:
+    overflow_proba: float
+    failure_proba: float
+    level_probas: list[float]
+    failures_per_overflow: float
+    num_events: int
+
+
+@dataclass(eq=False)
+class SplittingResult:
+    overflow_proba: ConfidenceInterval
+    failure_proba: ConfidenceInterval
+    estimates: list[SplittingEstimate]
+
+    @property
+    def num_events(self) -> int:
+        return sum(estimate.num_events for estimate in self.estimates)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'overflow_proba': self.overflow_proba,
+            'failure_proba': self.failure_proba,
+            'num_runs': len(self.estimates),
+            'num_events': self.num_events
+        }
+
+
+def get_occupancy(node: QueueingNode) -> int:
+    return node.queuelen + node.num_tasks
+
+
+def get_capacity(node: QueueingNode) -> int:
+    if node.queue.maxlen is None or node.channel_pool.max_channels is None:
+        raise ValueError(f'Node "{node.name}" must have a bounded queue and a finite number of channels')
+    return node.queue.maxlen + node.channel_pool.max_channels
+
+
+def get_levels(node: QueueingNode, settings: SplittingSettings) -> tuple[int, ...]:
+    capacity = get_capacity(node)
+    levels = tuple(range(settings.base_level + 1, capacity + 1)) if settings.levels is None else settings.levels
+    if not levels or levels[-1] != capacity or any(low >= high for low, high in zip(levels, levels[1:])):
+        raise ValueError(f'Levels must increase up to the capacity {capacity}. Given: {levels}')
+    if levels[0] <= settings.base_level:
+        raise ValueError(f'Levels must be above the base level {settings.base_level}. Given: {levels}')
+    return levels
+
+
+def _get_queueing_node(model: Model, name: str) -> QueueingNode:
+    node = model.nodes[name]
+    if not isinstance(node, QueueingNode):
+        raise ValueError(f'Splitting requires a queueing node. Given: "{name}"')
+    return node
+
+
+def _run_until(model: Model, name: str, stop_fn: Callable[[int], bool]) -> int:
+    node = model.nodes[name]
+    start_num_events = model.metrics.num_events
+    while model.next_time < INF_TIME:
+        model.step()
+        if stop_fn(get_occupancy(node)):
+            break
+    return model.metrics.num_events - start_num_events
+
+
+def _sample_states(states: list[Model], effort: int) -> list[Model]:
+    # Each state gets an equal share of the effort and the remainder goes to random states without repeats
+    num_copies, num_rest = divmod(effort, len(states))
+    return states * num_copies + random.sample(states, num_rest)
+
+
+def _run_crude(model: Model, settings: SplittingSettings, level: int) -> tuple[list[Model], int, int]:
+    node = _get_queueing_node(model, settings.node)
+    states: list[Model] = []
+    num_entrances = num_cycles = 0
+    is_above = is_reached = False
+    while model.step(settings.crude_time):
+        occupancy = get_occupancy(node)
+        if occupancy <= settings.base_level:
+            is_above = is_reached = False
+            continue
+        # A cycle starts when the occupancy leaves the base level
+        num_cycles += not is_above
+        is_above = True
+        if not is_reached and occupancy >= level:
+            is_reached = True
+            num_entrances += 1
+            # Reservoir sampling keeps a uniform sample of entrance states in bounded memory
+            if len(states) < settings.effort:
+                states.append(model.clone())
+            elif (idx := random.randrange(num_entrances)) < settings.effort:
+                states[idx] = model.clone()
+    return states, num_entrances, num_cycles
+
+
+def run_splitting(factory: ModelFactory, params: Mapping[str, Any], settings: SplittingSettings,
+                  seed: int) -> SplittingEstimate:
+    random.seed(seed)
+    model = factory(**params)
+    model.track_items = False
+    model.metrics.items.clear()
+    levels = get_levels(_get_queueing_node(model, settings.node), settings)
+
+    states, num_entrances, num_cycles = _run_crude(model, settings, levels[0])
+    num_events = model.metrics.num_events
+    arrivals_per_cycle = model.nodes[settings.node].metrics.num_in / max(num_cycles, 1)
+    level_probas = [num_entrances / max(num_cycles, 1)]
+    for level in levels[1:]:
+        if not states:
+            break
+        next_states: list[Model] = []
+        for state in _sample_states(states, settings.effort):
+            clone = state.clone()
+            num_events += _run_until(
+                clone, settings.node, lambda occupancy, level=level: not settings.base_level < occupancy < level)
+            if get_occupancy(clone.nodes[settings.node]) >= level:
+                next_states.append(clone)
+        level_probas.append(len(next_states) / settings.effort)
+        states = next_states
+
+    # Failures happen only at the full capacity, so they are counted from its entrance states to the cycle end
+    num_failures = 0
+    for state in _sample_states(states, settings.effort) if states else []:
+        clone = state.clone()
+        start_num_failures = clone.nodes[settings.node].metrics.num_failures
+        num_events += _run_until(clone, settings.node, lambda occupancy: occupancy <= settings.base_level)
+        num_failures += clone.nodes[settings.node].metrics.num_failures - start_num_failures
+    failures_per_overflow = num_failures / settings.effort
+
+    overflow_proba = math.prod(level_probas) if len(level_probas) == len(levels) else 0.0
+    return SplittingEstimate(overflow_proba=overflow_proba,
+                             failure_proba=overflow_proba * failures_per_overflow / max(arrivals_per_cycle, 1e-12),
+                             level_probas=level_probas,
+                             failures_per_overflow=failures_per_overflow,
+                             num_events=num_events)
+
+
+def estimate_failure_proba(factory: ModelFactory,
+                           params: Mapping[str, Any],
+                           settings: SplittingSettings,
+                           num_runs: int,
+                           seed: int = 0,
+                           alpha: float = 0.05) -> SplittingResult:
+    estimates = [run_splitting(factory, params, settings, seed=seed + idx) for idx in range(num_runs)]
+    return SplittingResult(
+        overflow_proba=mean_confidence_interval([estimate.overflow_proba for estimate in estimates], alpha),
+        failure_proba=mean_confidence_interval([estimate.failure_proba for estimate in estimates], alpha),
+        estimates=estimates)
@@ -0,0 +1,67 @@
+import sys
+import json
+import argparse
+import subprocess
+from typing import Optional, Sequence, Any
+
+CORE_MODULES = (
+    'qnet.common',
+    'qnet.dist',
+    'qnet.node',
+    'qnet.factory',
+    'qnet.queueing',
+    'qnet.transition',
+    'qnet.topology',
+    'qnet.model',
+    'qnet.trace',
+    'qnet.logger',
+    'qnet.spec',
+    'qnet.cache',
+    'qnet.stats',
+    'qnet.experiment',
+    'qnet.sweep',
+)
+
+LAZY_MODULES = ('dill', 'prettytable', 'numpy')
+
+_PROBE = '''
+import sys, json, time, importlib
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'import_ms': elapsed * 1000, 'loaded': [name for name in {lazy!r} if name in sys.modules]}}))
+'''
+
+
+def measure_import(modules: Sequence[str] = CORE_MODULES,
+                   lazy_modules: Sequence[str] = LAZY_MODULES,
+                   python: str = sys.executable) -> dict[str, Any]:
+    probe = _PROBE.format(modules=tuple(modules), lazy=tuple(lazy_modules))
+    output = subprocess.run([python, '-c', probe], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check qnet import time in a fresh interpreter')
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = [measure_import() for _ in range(args.repeat)]
+    import_ms = min(result['import_ms'] for result in results)
+    loaded = sorted({name for result in results for name in result['loaded']})
+    print(f'import time: {import_ms:.1f} ms (budget {args.budget_ms:.1f} ms)')
+
+    failed = False
+    if loaded:
+        print(f'heavy modules loaded eagerly: {", ".join(loaded)}')
+        failed = True
+    if import_ms > args.budget_ms:
+        print('import time exceeds the budget')
+        failed = True
+    return int(failed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import math
+import statistics
+from dataclasses import dataclass
+from typing import Sequence, Any
+
+
+@dataclass(frozen=True)
+class ConfidenceInterval:
+    mean: float
+    half_width: float
+
+    @property
+    def low(self) -> float:
+        return self.mean - self.half_width
+
+    @property
+    def high(self) -> float:
+        return self.mean + self.half_width
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'mean': self.mean, 'half_width': self.half_width}
+
+
+def mean_from_sums(count: int, total: float) -> float:
+    return total / max(count, 1)
+
+
+def std_from_sums(count: int, total: float, sq_total: float) -> float:
+    if count < 2:
+        return 0
+    variance = (sq_total - total**2 / count) / (count - 1)
+    return math.sqrt(max(variance, 0))
+
+
+def t_quantile(proba: float, df: float) -> float:
+    # Hill's algorithm 396 for Student's t-quantiles
+    assert 0 < proba < 1 and df > 0, (proba, df)
+    if proba < 0.5:
+        return -t_quantile(1 - proba, df)
+    if proba == 0.5:
+        return 0.0
+    p = 2 * (1 - proba)
+    if df == 1:
+        return 1 / math.tan(p * math.pi / 2)
+    if df == 2:
+        return math.sqrt(2 / (p * (2 - p)) - 2)
+    a = 1 / (df - 0.5)
+    b = 48 / (a * a)
+    c = ((20700 * a / b - 98) * a - 16) * a + 96.36
+    d = ((94.5 / (b + c) - 3) / b + 1) * math.sqrt(a * math.pi / 2) * df
+    x = d * p
+    y = x**(2 / df)
+    if y > 0.05 + a:
+        x = statistics.NormalDist().inv_cdf(p / 2)
+        y = x * x
+        if df < 5:
+            c += 0.3 * (df - 4.5) * (x + 0.6)
+        c = (((0.05 * d * x - 5) * x - 7) * x - 2) * x + b + c
+        y = (((((0.4 * y + 6.3) * y + 36) * y + 94.5) / c - y - 3) / b + 1) * x
+        y = math.expm1(a * y * y)
+    else:
+        y = ((1 / (((df + 6) / (df * y) - 0.089 * d - 0.822) * (df + 2) * 3) + 0.5 /
+              (df + 4)) * y - 1) * (df + 1) / (df + 2) + 1 / y
+    return math.sqrt(df * y)
+
+
+def mean_confidence_interval(values: Sequence[float], alpha: float = 0.05) -> ConfidenceInterval:
+    num_values = len(values)
+    if num_values == 0:
+        return ConfidenceInterval(mean=math.nan, half_width=math.nan)
+    mean = math.fsum(values) / num_values
+    if num_values == 1:
+        return ConfidenceInterval(mean=mean, half_width=math.inf)
+    if not all(map(math.isfinite, values)):
+        return ConfidenceInterval(mean=mean, half_width=math.nan)
+    std = statistics.stdev(values, xbar=mean)
+    half_width = t_quantile(1 - alpha / 2, num_values - 1) * std / math.sqrt(num_values)
+    return ConfidenceInterval(mean=mean, half_width=half_width)
@@ -0,0 +1,81 @@
+import math
+import random
+from typing import Mapping, Optional, Sequence
+
+from .common import I
+from .node import NodeMetrics
+from .factory import BaseFactoryNode
+from .queueing import QueueingMetrics, QueueingNode, Task
+from .model import Model
+
+OccupancyDistribution = list[float]
+
+
+def mmck_occupancy(arrival_rate: float,
+                   service_rate: float,
+                   channels: int,
+                   capacity: Optional[int] = None,
+                   tail_eps: float = 1e-12) -> OccupancyDistribution:
+    if capacity is None and arrival_rate >= channels * service_rate:
+        raise ValueError('Infinite queue is not stable with the given rates')
+    weights = [1.0]
+    occupancy = 0
+    # Terms are built by their ratios, so large factorials never appear
+    while capacity is None or occupancy < capacity:
+        occupancy += 1
+        weights.append(weights[-1] * arrival_rate / (service_rate * min(occupancy, channels)))
+        if capacity is None and occupancy >= channels and weights[-1] < tail_eps * sum(weights):
+            break
+    total = math.fsum(weights)
+    return [weight / total for weight in weights]
+
+
+def get_occupancy_distribution(metrics: QueueingMetrics) -> OccupancyDistribution:
+    if not metrics.occupancy_time:
+        raise ValueError(f'Node "{metrics.node_name}" has no occupancy records, add the occupancy collector')
+    total = math.fsum(metrics.occupancy_time.values())
+    return [metrics.occupancy_time.get(occupancy, 0) / total for occupancy in range(max(metrics.occupancy_time) + 1)]
+
+
+def sample_residual_time(node: QueueingNode[I, QueueingMetrics], item: I, num_samples: int = 64) -> float:
+    # The item in service is caught by a length-biased draw, and its remaining part is uniform within it
+    delays = [node._get_delay(item=item) for _ in range(num_samples)]
+    if math.fsum(delays) <= 0:
+        return 0.0
+    return random.random() * random.choices(delays, weights=delays)[0]
+
+
+def initialize_node(node: QueueingNode[I, QueueingMetrics],
+                    source: BaseFactoryNode[I, NodeMetrics],
+                    occupancy: int,
+                    num_samples: int = 64) -> None:
+    max_channels = node.channel_pool.max_channels
+    num_tasks = occupancy if max_channels is None else min(occupancy, max_channels)
+    if node.queue.maxlen is not None and occupancy - num_tasks > node.queue.maxlen:
+        raise ValueError(f'Occupancy {occupancy} exceeds the capacity of "{node.name}"')
+    for _ in range(num_tasks):
+        item = source._get_next_item()
+        residual_time = sample_residual_time(node, item, num_samples=num_samples)
+        node.add_task(Task[I](item=item, next_time=node.current_time + residual_time))
+    for _ in range(occupancy - num_tasks):
+        node.queue.push(source._get_next_item())
+
+
+def initialize_model(model: Model,
+                     distributions: Mapping[str, Sequence[float]],
+                     source: str,
+                     num_samples: int = 64) -> dict[str, int]:
+    factory = model.nodes[source]
+    if not isinstance(factory, BaseFactoryNode):
+        raise ValueError(f'Initial items must be created by a factory node. Given: "{source}"')
+    occupancies: dict[str, int] = {}
+    for name, distribution in distributions.items():
+        node = model.nodes[name]
+        if not isinstance(node, QueueingNode):
+            raise ValueError(f'Initial items can be added only to queueing nodes. Given: "{name}"')
+        if node.queuelen or node.num_tasks:
+            raise ValueError(f'Node "{name}" must be empty before the initialization')
+        occupancies[name] = random.choices(range(len(distribution)), weights=distribution)[0]
+        initialize_node(node, factory, occupancies[name], num_samples=num_samples)
+    model.collect_items()
+    return occupancies
@@ -0,0 +1,201 @@
+import copy
+import itertools
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Generic, Optional, TypeVar, Union, Any, cast
+
+from .common import ActionRecord, ActionType
+from .node import NM, Node, NodeMetrics
+from .factory import BaseFactoryNode
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+    from .model import Model
+
+SI = TypeVar('SI', bound='StoredItem')
+History = Union[list[ActionRecord], deque[ActionRecord]]
+
+
+class Column:
+
+    def __init__(self, typecode: str = 'd', default: float = 0) -> None:
+        self.typecode = typecode
+        self.default = default
+        self.name = ''
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, item: Optional['StoredItem'], owner: Optional[type] = None) -> Any:
+        if item is None:
+            return self
+        return item.store.columns[self.name][item.handle]
+
+    def __set__(self, item: 'StoredItem', value: Any) -> None:
+        item.store.columns[self.name][item.handle] = value
+
+
+def get_columns(item_type: type) -> dict[str, Column]:
+    columns: dict[str, Column] = {}
+    for cls in reversed(item_type.__mro__):
+        columns.update((name, value) for name, value in vars(cls).items() if isinstance(value, Column))
+    return columns
+
+
+class StoredItem:
+    # Items keep nothing but their slot, while values and histories live in the store
+    __slots__ = ('store', 'handle')
+
+    created_time = Column('d')
+    current_time = Column('d')
+    processed = Column('b')
+    serial = Column('q')
+
+    store: 'ItemStore'
+    handle: int
+
+    def __init__(self, *_: Any, **__: Any) -> None:
+        raise TypeError('Stored items must be created with "ItemStore.create"')
+
+    @property
+    def id(self) -> str:
+        return f'{self.store.prefix}{self.serial}'
+
+    @property
+    def history(self) -> History:
+        return cast(History, self.store.histories[self.handle])
+
+    @history.setter
+    def history(self, history: History) -> None:
+        self.store.histories[self.handle] = history
+
+    @property
+    def released_time(self) -> Optional[float]:
+        return self.current_time if self.processed else None
+
+    @property
+    def time_in_system(self) -> float:
+        return self.current_time - self.created_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'id': self.id}
+
+    def __copy__(self) -> 'StoredItem':
+        return self.store.copy(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> 'StoredItem':
+        store = copy.deepcopy(self.store, memo)
+        # A copied store already holds the values at the same handle, while a shared one needs a new slot
+        if store is self.store:
+            item = store.copy(self, history=copy.deepcopy(self.history, memo))
+        else:
+            item = self._with_handle(store, self.handle)
+        memo[id(self)] = item
+        return item
+
+    def _with_handle(self: SI, store: 'ItemStore', handle: int) -> SI:
+        item = type(self).__new__(type(self))
+        item.store, item.handle = store, handle
+        return item
+
+
+class ItemStore(Generic[SI]):
+
+    def __init__(self,
+                 item_type: type[SI] = StoredItem,
+                 prefix: str = '',
+                 history_len: Optional[int] = None,
+                 capacity: int = 1024) -> None:
+        self.item_type = item_type
+        self.prefix = prefix
+        self.history_len = history_len
+        self.specs = get_columns(item_type)
+        self.columns = {name: array(spec.typecode, [spec.default]) * capacity for name, spec in self.specs.items()}
+        self.histories: list[Optional[History]] = [None] * capacity
+        self.alive = array('b', bytes(capacity))
+        self.free_handles = list(reversed(range(capacity)))
+        self.counter = itertools.count()
+
+    def __len__(self) -> int:
+        return self.capacity - len(self.free_handles)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def create(self, created_time: float, **values: Any) -> SI:
+        handle = self._allocate()
+        item = self.item_type.__new__(self.item_type)
+        item.store, item.handle = self, handle
+        for name, spec in self.specs.items():
+            self.columns[name][handle] = spec.default
+        item.serial = next(self.counter)
+        item.created_time = item.current_time = created_time
+        self.histories[handle] = [] if self.history_len is None else deque(maxlen=self.history_len)
+        for name, value in values.items():
+            setattr(item, name, value)
+        return item
+
+    def copy(self, item: SI, history: Optional[History] = None) -> SI:
+        handle = self._allocate()
+        for values in self.columns.values():
+            values[handle] = values[item.handle]
+        self.histories[handle] = copy.copy(item.history) if history is None else history
+        return item._with_handle(self, handle)
+
+    def release(self, item: StoredItem) -> None:
+        self.free(item.handle)
+
+    def free(self, handle: int) -> None:
+        if self.alive[handle]:
+            self.alive[handle] = 0
+            self.histories[handle] = None
+            self.free_handles.append(handle)
+
+    def attach(self, model: 'Model') -> None:
+        # Released items are still referenced by tracking models, which would read reused slots later
+        if model.track_items:
+            raise ValueError('Items released to the store must not be tracked by the model')
+        for node in model.topology.nodes:
+            node.add_listener(ActionType.RELEASE, self._item_release_listener)
+
+    def detach(self, model: 'Model') -> None:
+        for node in model.topology.nodes:
+            node.remove_listener(ActionType.RELEASE, self._item_release_listener)
+
+    def column(self, name: str) -> 'npt.NDArray':
+        # A shared view would lock the buffer and make the next growth fail, so the column is copied
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        return np.frombuffer(self.columns[name], dtype=self.columns[name].typecode).copy()
+
+    def alive_mask(self) -> 'npt.NDArray':
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        return np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+
+    def _item_release_listener(self, _: Node[Any, NodeMetrics], item: SI) -> None:
+        self.free(item.handle)
+
+    def _allocate(self) -> int:
+        if not self.free_handles:
+            self._grow()
+        handle = self.free_handles.pop()
+        self.alive[handle] = 1
+        return handle
+
+    def _grow(self) -> None:
+        capacity = self.capacity
+        for name, spec in self.specs.items():
+            self.columns[name].extend(array(spec.typecode, [spec.default]) * capacity)
+        self.histories.extend([None] * capacity)
+        self.alive.extend(bytes(capacity))
+        self.free_handles.extend(reversed(range(capacity, 2 * capacity)))
+
+
+class StoredFactoryNode(BaseFactoryNode[SI, NM]):  # type: ignore[type-var]
+
+    def __init__(self, store: ItemStore[SI], **kwargs: Any) -> None:
+        self.store = store
+        super().__init__(**kwargs)
+
+    def _get_next_item(self) -> SI:
+        return self.store.create(created_time=self.current_time)
@@ -0,0 +1,146 @@
+import os
+import json
+import itertools
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, Mapping, Optional, Sequence, Union, Any
+
+from .cache import MetricVector, ResultCache
+from .experiment import ModelFactory, RunSettings, get_run_key, run_replication
+from .stats import ConfidenceInterval, mean_confidence_interval
+from .variance import ControlVariate, summarize_runs
+
+ParamsGrid = Union[Mapping[str, Sequence[Any]], Sequence[Mapping[str, Any]]]
+CostFn = Callable[[Mapping[str, Any]], float]
+
+# Parameters and metrics share the table with the run counts, so the column is named like a sweep-level metric
+NUM_RUNS_COLUMN = 'sweep__num_runs'
+
+
+def expand_grid(params: ParamsGrid) -> list[dict[str, Any]]:
+    if isinstance(params, Mapping):
+        names = list(params)
+        return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+    return [dict(config) for config in params]
+
+
+@dataclass(frozen=True)
+class SweepTask:
+    config_idx: int
+    run_idx: int
+    params: dict[str, Any]
+    seed: int
+    cost: float
+    key: str
+
+
+@dataclass(eq=False)
+class SweepTable:
+    param_names: list[str]
+    metric_names: list[str]
+    columns: dict[str, list[Any]]
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.columns[NUM_RUNS_COLUMN])
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        for idx in range(self.num_rows):
+            yield {name: column[idx] for name, column in self.columns.items()}
+
+    def to_dict(self) -> dict[str, Any]:
+        return self.columns
+
+
+class Checkpoint:
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = Path(path)
+
+    def load(self) -> dict[str, MetricVector]:
+        results: dict[str, MetricVector] = {}
+        if not self.path.exists():
+            return results
+        with self.path.open(encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut off by an interruption
+                    continue
+                results[record['key']] = record['metrics']
+        return results
+
+    def save(self, key: str, metrics: MetricVector) -> None:
+        with self.path.open('a', encoding='utf-8') as file:
+            file.write(json.dumps({'key': key, 'metrics': metrics}) + '\n')
+
+
+def sweep(factory: ModelFactory,
+          params: ParamsGrid,
+          settings: RunSettings,
+          num_runs: int,
+          base_params: Optional[Mapping[str, Any]] = None,
+          seed: int = 0,
+          n_jobs: int = 1,
+          cost_fn: Optional[CostFn] = None,
+          checkpoint: Optional[Union[str, os.PathLike]] = None,
+          cache: Optional[ResultCache] = None,
+          alpha: float = 0.05,
+          controls: Sequence[ControlVariate] = ()) -> SweepTable:
+    configs = [{**(base_params or {}), **config} for config in expand_grid(params)]
+    tasks = [
+        SweepTask(config_idx=config_idx,
+                  run_idx=run_idx,
+                  params=config,
+                  seed=seed + run_idx,
+                  cost=0.0 if cost_fn is None else cost_fn(config),
+                  key=get_run_key(factory, config, settings, seed + run_idx))
+        for config_idx, config in enumerate(configs) for run_idx in range(num_runs)
+    ]
+
+    store = None if checkpoint is None else Checkpoint(checkpoint)
+    results = {} if store is None else store.load()
+    pending = [task for task in tasks if task.key not in results]
+    if cost_fn is not None:
+        # Long tasks go first, so they do not end up alone in the pool at the end of the sweep
+        pending.sort(key=lambda task: task.cost, reverse=True)
+
+    def complete(task: SweepTask, metrics: MetricVector) -> None:
+        results[task.key] = metrics
+        if store is not None:
+            store.save(task.key, metrics)
+
+    if n_jobs == 1 or len(pending) <= 1:
+        for task in pending:
+            complete(task, run_replication(factory, task.params, settings, seed=task.seed, cache=cache))
+    else:
+        with ProcessPoolExecutor(max_workers=None if n_jobs < 0 else n_jobs) as executor:
+            futures = {
+                executor.submit(run_replication, factory, task.params, settings, seed=task.seed, cache=cache): task
+                for task in pending
+            }
+            for future in as_completed(futures):
+                complete(futures[future], future.result())
+
+    return _build_table(configs, tasks, results, num_runs, alpha, controls)
+
+
+def _build_table(configs: list[dict[str, Any]], tasks: list[SweepTask], results: dict[str, MetricVector],
+                 num_runs: int, alpha: float, controls: Sequence[ControlVariate]) -> SweepTable:
+    param_names = list(dict.fromkeys(name for config in configs for name in config))
+    runs_metrics: list[list[MetricVector]] = [[] for _ in configs]
+    for task in tasks:
+        runs_metrics[task.config_idx].append(results[task.key])
+    metric_names = list(dict.fromkeys(name for runs in runs_metrics for metrics in runs for name in metrics))
+
+    columns: dict[str, list[Any]] = {name: [config.get(name) for config in configs] for name in param_names}
+    columns[NUM_RUNS_COLUMN] = [num_runs] * len(configs)
+    summaries = [summarize_runs(runs, controls, alpha) for runs in runs_metrics]
+    for name in metric_names:
+        column: list[ConfidenceInterval] = [
+            summary[name] if name in summary else mean_confidence_interval([], alpha) for summary in summaries
+        ]
+        columns[name] = column
+    return SweepTable(param_names=param_names, metric_names=metric_names, columns=columns)
@@ -0,0 +1,123 @@
+import copy
+import math
+from types import MappingProxyType
+from dataclasses import dataclass, replace
+from typing import Callable, Generic, Iterable, Mapping, Optional, Union, Any
+
+from .common import I
+from .node import Node, NodeMetrics
+from .transition import BaseTransitionNode, ProbaTransitionNode
+
+RELEASE = -1
+PROBA_EPS = 1e-9
+
+
+def discover_nodes(root: Node[I, NodeMetrics]) -> list[Node[I, NodeMetrics]]:
+    nodes: dict[str, Node[I, NodeMetrics]] = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.name in nodes:
+            if nodes[node.name] is not node:
+                raise ValueError(f'Nodes must have different names. Duplicate: "{node.name}"')
+            continue
+        nodes[node.name] = node
+        stack.extend(reversed(list(node.connected_nodes)))
+    return list(nodes.values())
+
+
+@dataclass(frozen=True, eq=False)
+class Route:
+    targets: tuple[int, ...]
+    probas: tuple[float, ...]
+
+
+@dataclass(frozen=True, eq=False)
+class Topology(Generic[I]):
+    nodes: tuple[Node[I, NodeMetrics], ...]
+    names: tuple[str, ...]
+    indices: Mapping[str, int]
+    adjacency: tuple[tuple[int, ...], ...]
+    routes: tuple[Optional[Route], ...]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __getitem__(self, key: Union[int, str]) -> Node[I, NodeMetrics]:
+        return self.nodes[self.indices[key] if isinstance(key, str) else key]
+
+    def index(self, node: Union[Node[I, NodeMetrics], str]) -> int:
+        return self.indices[node if isinstance(node, str) else node.name]
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> 'Topology[I]':
+        # Mapping proxies cannot be copied, so the indices are wrapped again
+        return replace(self, nodes=copy.deepcopy(self.nodes, memo), indices=MappingProxyType(dict(self.indices)))
+
+
+def compile_topology(nodes: Iterable[Node[I, NodeMetrics]]) -> Topology[I]:
+    ordered = tuple(nodes)
+    indices: dict[str, int] = {}
+    for idx, node in enumerate(ordered):
+        if node.name in indices:
+            raise ValueError(f'Nodes must have different names. Duplicate: "{node.name}"')
+        indices[node.name] = idx
+
+    def get_index(node: Optional[Node[I, NodeMetrics]]) -> int:
+        if node is None:
+            return RELEASE
+        idx = indices.get(node.name)
+        if idx is None or ordered[idx] is not node:
+            raise ValueError(f'Node "{node.name}" is not a part of the topology')
+        return idx
+
+    adjacency: list[tuple[int, ...]] = []
+    routes: list[Optional[Route]] = []
+    for node in ordered:
+        adjacency.append(tuple(dict.fromkeys(get_index(successor) for successor in node.successor_nodes)))
+        routes.append(_compile_route(node, get_index))
+
+    _check_zero_delay_cycles(ordered, adjacency)
+    for idx, node in enumerate(ordered):
+        node.index = idx
+    return Topology[I](nodes=ordered,
+                       names=tuple(indices),
+                       indices=MappingProxyType(indices),
+                       adjacency=tuple(adjacency),
+                       routes=tuple(routes))
+
+
+def _check_zero_delay_cycles(nodes: tuple[Node[I, NodeMetrics], ...], adjacency: list[tuple[int, ...]]) -> None:
+    # Items could circle between such nodes forever without the model time moving
+    is_zero_delay = [isinstance(node, BaseTransitionNode) and node.inline for node in nodes]
+    states = [0] * len(nodes)
+    for root in range(len(nodes)):
+        if not is_zero_delay[root] or states[root]:
+            continue
+        path = [root]
+        stack = [iter(adjacency[root])]
+        states[root] = 1
+        while stack:
+            idx = next(stack[-1], None)
+            if idx is None:
+                states[path.pop()] = 2
+                stack.pop()
+            elif idx != RELEASE and is_zero_delay[idx]:
+                if states[idx] == 1:
+                    cycle = ' -> '.join(nodes[node_idx].name for node_idx in path[path.index(idx):] + [idx])
+                    raise ValueError(f'Zero-delay nodes must not form a cycle: {cycle}')
+                if states[idx] == 0:
+                    states[idx] = 1
+                    path.append(idx)
+                    stack.append(iter(adjacency[idx]))
+
+
+def _compile_route(node: Node[I, NodeMetrics],
+                   get_index: Callable[[Optional[Node[I, NodeMetrics]]], int]) -> Optional[Route]:
+    if isinstance(node, ProbaTransitionNode):
+        proba_sum = math.fsum(node.next_probas)
+        if abs(proba_sum - 1) > PROBA_EPS:
+            raise ValueError(f'Total probability of "{node.name}" must be equal to 1. Given: {proba_sum}')
+        return Route(targets=tuple(map(get_index, node.next_nodes)), probas=tuple(node.next_probas))
+    if isinstance(node, BaseTransitionNode):
+        return None
+    return Route(targets=(get_index(node.next_node), ), probas=(1.0, ))
@@ -0,0 +1,140 @@
+import os
+import json
+from enum import Enum
+from pathlib import Path
+from dataclasses import dataclass
+from collections.abc import Mapping
+from typing import Callable, Generic, Iterable, Iterator, Optional, Union, Any
+
+from .common import INF_TIME, I, ActionType, SupportsDict
+from .node import Node, NodeMetrics
+from .topology import Topology
+
+NodeState = dict[str, Any]
+NodesDelta = dict[str, NodeState]
+NodeSnapshot = Callable[[Node[I, NodeMetrics]], NodeState]
+
+
+@dataclass(frozen=True)
+class StateSampling:
+    every_events: int = 1
+    every_time: float = 0
+
+
+@dataclass(frozen=True)
+class StateDelta(SupportsDict):
+    time: float
+    nodes: NodesDelta
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'time': self.time, 'nodes': self.nodes}
+
+
+def to_plain(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Enum):
+        return to_plain(value.value)
+    if isinstance(value, SupportsDict):
+        return to_plain(value.to_dict())
+    if isinstance(value, Mapping):
+        return {str(key): to_plain(item) for key, item in value.items()}
+    if isinstance(value, Iterable):
+        return [to_plain(item) for item in value]
+    return str(value)
+
+
+def plain_snapshot(node: Node[I, NodeMetrics]) -> NodeState:
+    return {name: to_plain(value) for name, value in node.to_dict().items()}
+
+
+class DeltaEncoder(Generic[I]):
+
+    def __init__(self, snapshot: NodeSnapshot = plain_snapshot) -> None:
+        self.snapshot = snapshot
+        self.states: dict[str, NodeState] = {}
+
+    def encode(self, nodes: Iterable[Node[I, NodeMetrics]]) -> NodesDelta:
+        delta: NodesDelta = {}
+        for node in nodes:
+            state = self.snapshot(node)
+            prev_state = self.states.get(node.name, {})
+            changes = {
+                name: value
+                for name, value in state.items() if name not in prev_state or prev_state[name] != value
+            }
+            if changes:
+                delta[node.name] = changes
+            self.states[node.name] = state
+        return delta
+
+    def reset(self) -> None:
+        self.states.clear()
+
+
+class StateTracer(Generic[I]):
+
+    def __init__(self, topology: Topology[I], sampling: Optional[StateSampling] = None) -> None:
+        self.topology = topology
+        self.sampling = StateSampling() if sampling is None else sampling
+        self.num_events = 0
+        self.last_time = -INF_TIME
+        # The first sample has to contain every node to be a baseline for the following deltas
+        self.touched: dict[int, None] = dict.fromkeys(range(len(topology)))
+        self.prev_touched: dict[int, None] = {}
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self.touched)
+
+    def attach(self) -> None:
+        for node in self.topology.nodes:
+            node.add_listener(ActionType.IN, self._item_in_listener)
+            node.add_listener(ActionType.OUT, self._item_out_listener)
+
+    def detach(self) -> None:
+        for node in self.topology.nodes:
+            node.remove_listener(ActionType.IN, self._item_in_listener)
+            node.remove_listener(ActionType.OUT, self._item_out_listener)
+
+    def poll(self, time: float) -> Optional[list[Node[I, NodeMetrics]]]:
+        self.num_events += 1
+        if self.num_events % self.sampling.every_events != 0 or time - self.last_time < self.sampling.every_time:
+            return None
+        return self.flush(time)
+
+    def flush(self, time: float) -> list[Node[I, NodeMetrics]]:
+        self.last_time = time
+        # Nodes may also drop their transient state on the next time update (e.g. transitions forget next node)
+        nodes = [self.topology.nodes[idx] for idx in sorted(self.touched.keys() | self.prev_touched.keys())]
+        self.prev_touched, self.touched = self.touched, {}
+        return nodes
+
+    def _item_in_listener(self, node: Node[I, NodeMetrics], _: I) -> None:
+        self.touched[node.index] = None
+
+    def _item_out_listener(self, node: Node[I, NodeMetrics], _: I) -> None:
+        # Ending actions may rearrange connected nodes without passing items to them (e.g. queue balancing)
+        self.touched[node.index] = None
+        self.touched.update(dict.fromkeys(self.topology.adjacency[node.index]))
+
+
+def replay_deltas(deltas: Iterable[StateDelta]) -> Iterator[tuple[float, dict[str, NodeState]]]:
+    states: dict[str, NodeState] = {}
+    for delta in deltas:
+        for name, changes in delta.nodes.items():
+            states.setdefault(name, {}).update(changes)
+        yield delta.time, {name: dict(state) for name, state in states.items()}
+
+
+def write_deltas(path: Union[str, os.PathLike], deltas: Iterable[StateDelta]) -> None:
+    with Path(path).open('a', encoding='utf-8') as file:
+        for delta in deltas:
+            file.write(json.dumps(delta.to_dict()) + '\n')
+
+
+def read_deltas(path: Union[str, os.PathLike]) -> Iterator[StateDelta]:
+    with Path(path).open(encoding='utf-8') as file:
+        for line in file:
+            record = json.loads(line)
+            yield StateDelta(time=record['time'], nodes=record['nodes'])
@@ -1,17 +1,44 @@
 import random
-from abc import abstractmethod
 import itertools
-from typing import Iterable, Optional, Any, cast
+from abc import abstractmethod
+from collections import deque
+from typing import Generic, Iterable, Optional, Sequence, Any, cast
 
-from .common import INF_TIME, I
+from .common import INF_TIME, I, ActionType, IndexedHeap
 from .node import NM, Node, NodeMetrics, DelayFn
+from .queueing import QueueingNode
 from .utils import filter_none
 
 
+class InlineWorklist(Generic[I]):
+
+    def __init__(self) -> None:
+        self.hand_offs: deque[tuple['BaseTransitionNode[I, NodeMetrics]', I]] = deque()
+        self.is_draining = False
+
+    def push(self, node: 'BaseTransitionNode[I, NodeMetrics]', item: I) -> None:
+        self.hand_offs.append((node, item))
+        # Hand-offs made while draining are left to the loop below, so chains of transitions do not recurse
+        if self.is_draining:
+            return
+        self.is_draining = True
+        try:
+            while self.hand_offs:
+                node, item = self.hand_offs.popleft()
+                node.item = item
+                node.end_action()
+        finally:
+            self.hand_offs.clear()
+            self.is_draining = False
+
+
 class BaseTransitionNode(Node[I, NM]):
 
-    def __init__(self, delay_fn: DelayFn = lambda: 0, **kwargs: Any) -> None:
-        super().__init__(delay_fn=delay_fn, **kwargs)
+    def __init__(self, delay_fn: Optional[DelayFn] = None, **kwargs: Any) -> None:
+        super().__init__(delay_fn=(lambda: 0) if delay_fn is None else delay_fn, **kwargs)
+        # Zero-delay transitions route items right away instead of spending a model step on it
+        self.inline = delay_fn is None
+        self.worklist = InlineWorklist[I]()
         self.item: Optional[I] = None
         self.next_time = INF_TIME
 
@@ -19,10 +46,19 @@ class BaseTransitionNode(Node[I, NM]):
     def current_items(self) -> Iterable[I]:
         return filter_none((self.item, ))
 
+    @property
+    @abstractmethod
+    def successor_nodes(self) -> Iterable[Node[I, NodeMetrics]]:
+        # The next node is picked per item, so every node it may be picked from has to be declared
+        raise NotImplementedError
+
     def start_action(self, item: I) -> None:
         super().start_action(item)
-        self.item = item
-        self.next_time = self._predict_next_time()
+        if self.inline:
+            self.worklist.push(cast(BaseTransitionNode[I, NodeMetrics], self), item)
+        else:
+            self.item = item
+            self.next_time = self._predict_next_time()
 
     def end_action(self) -> I:
         item = cast(I, self.item)
@@ -65,12 +101,16 @@ class ProbaTransitionNode(BaseTransitionNode[I, NM]):
         return 1 - self.proba_sum
 
     @property
-    def num_next_nodes(self) -> int:
-        return len(self.next_nodes)
+    def connected_nodes(self) -> Iterable[Node[I, NodeMetrics]]:
+        return itertools.chain(filter_none(self.next_nodes), super().connected_nodes)
 
     @property
-    def connected_nodes(self) -> Iterable['Node[I, NodeMetrics]']:
-        return itertools.chain(filter_none(self.next_nodes), super().connected_nodes)
+    def successor_nodes(self) -> Iterable[Node[I, NodeMetrics]]:
+        return filter_none(self.next_nodes)
+
+    @property
+    def num_next_nodes(self) -> int:
+        return len(self.next_nodes)
 
     def add_next_node(self, node: Optional[Node[I, NodeMetrics]], proba: float = 1.0) -> None:
         proba_sum = self.proba_sum + proba
@@ -80,5 +120,105 @@ class ProbaTransitionNode(BaseTransitionNode[I, NM]):
         self.next_probas.append(proba)
 
     def _get_next_node(self, _: I) -> Optional[Node[I, NodeMetrics]]:
-        assert self.proba_sum == 1, 'Total probability must be equal to 1'
         return random.choices(self.next_nodes, self.next_probas, k=1)[0]
+
+
+class ShortestQueueTransitionNode(BaseTransitionNode[I, NM]):
+
+    def __init__(self,
+                 targets: Sequence[QueueingNode[I, Any]] = (),
+                 min_jockey_diff: Optional[int] = None,
+                 **kwargs: Any) -> None:
+        if min_jockey_diff is not None and min_jockey_diff < 1:
+            raise ValueError(f'Minimal jockeying difference must be at least 1. Given: {min_jockey_diff}')
+        super().__init__(**kwargs)
+        self.min_jockey_diff = min_jockey_diff
+        self.num_jockeys = 0
+        self._is_jockeying = False
+        self._targets: list[QueueingNode[I, Any]] = []
+        self._target_indices: dict[str, int] = {}
+        self._dirty: dict[int, None] = {}
+        self._by_load = IndexedHeap()
+        self._by_queuelen = IndexedHeap()
+        self.targets = targets
+
+    @property
+    def targets(self) -> list[QueueingNode[I, Any]]:
+        return self._targets
+
+    @targets.setter
+    def targets(self, targets: Sequence[QueueingNode[I, Any]]) -> None:
+        for target in self._targets:
+            target.remove_listener(ActionType.IN, self._target_in_listener)
+            target.remove_listener(ActionType.OUT, self._target_out_listener)
+        self._targets = list(targets)
+        self._target_indices = {target.name: idx for idx, target in enumerate(self._targets)}
+        self._dirty.clear()
+        self._by_load = IndexedHeap([self._get_load_key(idx) for idx in range(len(self._targets))])
+        self._by_queuelen = IndexedHeap([self._get_queuelen_key(idx) for idx in range(len(self._targets))])
+        for target in self._targets:
+            target.add_listener(ActionType.IN, self._target_in_listener)
+            target.add_listener(ActionType.OUT, self._target_out_listener)
+
+    @property
+    def connected_nodes(self) -> Iterable[Node[I, NodeMetrics]]:
+        return itertools.chain(self._targets, super().connected_nodes)
+
+    @property
+    def successor_nodes(self) -> Iterable[Node[I, NodeMetrics]]:
+        return iter(self._targets)
+
+    def reset(self) -> None:
+        super().reset()
+        self.num_jockeys = 0
+        self._is_jockeying = False
+        # Targets may be reset after this node, so their lengths are read on the next routing
+        self._dirty = dict.fromkeys(range(len(self._targets)))
+
+    def to_dict(self) -> dict[str, Any]:
+        node_dict = super().to_dict()
+        node_dict['num_jockeys'] = self.num_jockeys
+        return node_dict
+
+    def _get_load_key(self, idx: int) -> tuple[int, int]:
+        target = self._targets[idx]
+        return (target.queuelen + target.num_tasks, idx)
+
+    def _get_queuelen_key(self, idx: int) -> tuple[int, int]:
+        return (-self._targets[idx].queuelen, idx)
+
+    def _refresh(self) -> None:
+        # Lengths are read lazily, because listeners are notified before the target stores the item
+        for idx in self._dirty:
+            self._by_load.update(idx, self._get_load_key(idx))
+            self._by_queuelen.update(idx, self._get_queuelen_key(idx))
+        self._dirty.clear()
+
+    def _target_in_listener(self, target: Node[I, NodeMetrics], _: I) -> None:
+        self._dirty[self._target_indices[target.name]] = None
+
+    def _target_out_listener(self, target: Node[I, NodeMetrics], _: I) -> None:
+        receiver_idx = self._target_indices[target.name]
+        self._dirty[receiver_idx] = None
+        # Jockeyed items leave their donors through the out path, which must not start another round
+        if self.min_jockey_diff is None or self._is_jockeying:
+            return
+        receiver = self._targets[receiver_idx]
+        self._is_jockeying = True
+        try:
+            self._refresh()
+            while True:
+                donor_idx = self._by_queuelen.top
+                donor = self._targets[donor_idx]
+                if donor.queuelen - receiver.queuelen < self.min_jockey_diff:
+                    break
+                donor.jockey(receiver)
+                self.num_jockeys += 1
+                self._dirty[donor_idx] = None
+                self._refresh()
+        finally:
+            self._is_jockeying = False
+
+    def _get_next_node(self, _: I) -> Optional[Node[I, NodeMetrics]]:
+        self._refresh()
+        return self._targets[self._by_load.top]
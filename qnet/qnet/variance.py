@@ -0,0 +1,77 @@
+import math
+import random
+import contextlib
+from dataclasses import dataclass
+from typing import Iterator, Mapping, Sequence
+
+from .dist import GENERATOR
+from .stats import ConfidenceInterval, mean_confidence_interval, t_quantile
+
+
+@dataclass(frozen=True)
+class ControlVariate:
+    metric: str
+    expected: float
+
+
+@contextlib.contextmanager
+def antithetic(enabled: bool = True) -> Iterator[None]:
+    if not enabled:
+        yield
+        return
+    sample = random.random
+
+    def complement() -> float:
+        return 1.0 - sample()
+
+    # Samplers draw uniforms through the generator or the module function, so both are shadowed.
+    # The shadowing is process-wide, so any code running inside the context draws complements too.
+    # Integer draws (randint, randrange, shuffle, getrandbits) do not go through random() and are not complemented,
+    # so e.g. 'randint' batch sizes are the same in both runs of a pair.
+    GENERATOR.random = complement  # type: ignore[method-assign]
+    random.random = complement
+    try:
+        yield
+    finally:
+        del GENERATOR.random
+        random.random = sample
+
+
+def average_metric_vectors(first: Mapping[str, float], second: Mapping[str, float]) -> dict[str, float]:
+    return {name: (value + second[name]) / 2 for name, value in first.items() if name in second}
+
+
+def controlled_confidence_interval(values: Sequence[float],
+                                   controls: Sequence[Sequence[float]],
+                                   expected: Sequence[float],
+                                   alpha: float = 0.05) -> ConfidenceInterval:
+    num_values, num_controls = len(values), len(expected)
+    df = num_values - num_controls - 1
+    if num_controls == 0 or df < 1:
+        return mean_confidence_interval(values, alpha)
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    # The intercept of the regression on centered controls is the adjusted estimator
+    design = np.column_stack([np.ones(num_values), *(np.asarray(row) - mean for row, mean in zip(controls, expected))])
+    coefficients, *_ = np.linalg.lstsq(design, np.asarray(values), rcond=None)
+    residuals = np.asarray(values) - design @ coefficients
+    variance = residuals @ residuals / df * np.linalg.pinv(design.T @ design)[0, 0]
+    return ConfidenceInterval(mean=float(coefficients[0]),
+                              half_width=t_quantile(1 - alpha / 2, df) * math.sqrt(max(float(variance), 0)))
+
+
+def summarize_runs(runs: Sequence[Mapping[str, float]],
+                   controls: Sequence[ControlVariate] = (),
+                   alpha: float = 0.05) -> dict[str, ConfidenceInterval]:
+    control_names = {control.metric for control in controls}
+    names = dict.fromkeys(name for metrics in runs for name in metrics)
+    summary: dict[str, ConfidenceInterval] = {}
+    for name in names:
+        if name in control_names:
+            summary[name] = mean_confidence_interval([metrics[name] for metrics in runs if name in metrics], alpha)
+            continue
+        valid = [metrics for metrics in runs if name in metrics and control_names.issubset(metrics)]
+        summary[name] = controlled_confidence_interval([metrics[name] for metrics in valid],
+                                                       [[metrics[control.metric] for metrics in valid]
+                                                        for control in controls],
+                                                       [control.expected for control in controls], alpha)
+    return summary
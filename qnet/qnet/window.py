@@ -0,0 +1,132 @@
+from typing import Optional, Any
+
+from .common import TIME_EPS, SupportsDict
+
+
+class WindowSum:
+
+    def __init__(self, width: float, num_buckets: int = 32) -> None:
+        assert width > 0 and num_buckets > 0, (width, num_buckets)
+        self.width = width
+        self.num_buckets = num_buckets
+        self.bucket_width = width / num_buckets
+        self.buckets = [0.0] * num_buckets
+        self.bucket_idx = 0
+        self.total = 0.0
+
+    def reset(self) -> None:
+        self.buckets = [0.0] * self.num_buckets
+        self.bucket_idx = 0
+        self.total = 0.0
+
+    def get_bucket_idx(self, time: float) -> int:
+        return int(time // self.bucket_width)
+
+    def advance(self, time: float) -> None:
+        bucket_idx = self.get_bucket_idx(time)
+        if bucket_idx <= self.bucket_idx:
+            return
+        if bucket_idx - self.bucket_idx >= self.num_buckets:
+            self.buckets = [0.0] * self.num_buckets
+            self.total = 0.0
+        else:
+            for idx in range(self.bucket_idx + 1, bucket_idx + 1):
+                self.total -= self.buckets[idx % self.num_buckets]
+                self.buckets[idx % self.num_buckets] = 0.0
+        self.bucket_idx = bucket_idx
+
+    def add(self, time: float, value: float) -> None:
+        self.advance(time)
+        if self.get_bucket_idx(time) > self.bucket_idx - self.num_buckets:
+            self.buckets[self.get_bucket_idx(time) % self.num_buckets] += value
+            self.total += value
+
+    def add_interval(self, start_time: float, end_time: float, rate: float) -> None:
+        if rate == 0 or end_time <= start_time:
+            return
+        last_idx = self.get_bucket_idx(end_time)
+        # Buckets older than the window would be dropped right away
+        first_idx = max(self.get_bucket_idx(start_time), last_idx - self.num_buckets + 1)
+        for idx in range(first_idx, last_idx + 1):
+            low = max(start_time, idx * self.bucket_width)
+            high = min(end_time, (idx + 1) * self.bucket_width)
+            if high > low:
+                self.add(low, rate * (high - low))
+
+    def sum(self, time: float) -> float:
+        self.advance(time)
+        return self.total
+
+    def get_start_time(self, time: float) -> float:
+        return (self.get_bucket_idx(time) - self.num_buckets + 1) * self.bucket_width
+
+
+class SlidingWindow(SupportsDict):
+
+    def __init__(self, width: float, num_buckets: int = 32) -> None:
+        self.width = width
+        self.num_buckets = num_buckets
+        self.num_in = WindowSum(width, num_buckets)
+        self.num_out = WindowSum(width, num_buckets)
+        self.num_failures = WindowSum(width, num_buckets)
+        self.queuelen_time = WindowSum(width, num_buckets)
+        self.load_time = WindowSum(width, num_buckets)
+        self.start_time: Optional[float] = None
+        self.time = 0.0
+
+    @property
+    def span(self) -> float:
+        if self.start_time is None:
+            return TIME_EPS
+        return max(self.time - max(self.start_time, self.num_in.get_start_time(self.time)), TIME_EPS)
+
+    @property
+    def arrival_rate(self) -> float:
+        return self.num_in.sum(self.time) / self.span
+
+    @property
+    def throughput(self) -> float:
+        return self.num_out.sum(self.time) / self.span
+
+    @property
+    def mean_queuelen(self) -> float:
+        return self.queuelen_time.sum(self.time) / self.span
+
+    @property
+    def utilization(self) -> float:
+        return self.load_time.sum(self.time) / self.span
+
+    @property
+    def failure_proba(self) -> float:
+        return self.num_failures.sum(self.time) / max(self.num_in.sum(self.time), 1)
+
+    def reset(self) -> None:
+        for window_sum in (self.num_in, self.num_out, self.num_failures, self.queuelen_time, self.load_time):
+            window_sum.reset()
+        self.start_time = None
+        self.time = 0.0
+
+    def update_time(self, start_time: float, end_time: float, queuelen: int, load: float) -> None:
+        if self.start_time is None:
+            self.start_time = start_time
+        self.queuelen_time.add_interval(start_time, end_time, queuelen)
+        self.load_time.add_interval(start_time, end_time, load)
+        self.time = end_time
+
+    def add_in(self) -> None:
+        self.num_in.add(self.time, 1)
+
+    def add_out(self) -> None:
+        self.num_out.add(self.time, 1)
+
+    def add_failure(self) -> None:
+        self.num_failures.add(self.time, 1)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'arrival_rate': self.arrival_rate,
+            'throughput': self.throughput,
+            'mean_queuelen': self.mean_queuelen,
+            'utilization': self.utilization,
+            'failure_proba': self.failure_proba,
+        }
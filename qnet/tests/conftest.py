@@ -0,0 +1,17 @@
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec
+
+ARRIVAL = DistSpec('exponential', {'lambd': 1.0})
+SERVICE = DistSpec('exponential', {'lambd': 1.2})
+
+
+def get_queue_spec(service=SERVICE, arrival=ARRIVAL, node_type='queueing', batch=None, initial=(), track_items=True,
+                   **queue_kwargs):
+    nodes = (
+        NodeSpec(name='factory', type='factory', delay=arrival, batch=batch, next_node='queue'),
+        NodeSpec(name='queue', type=node_type, delay=service, **queue_kwargs),
+    )
+    return ModelSpec(nodes=nodes, initial=initial, track_items=track_items)
+
+
+def build_queue_model(channels=1):
+    return ModelBuilder().build(get_queue_spec(channels=channels))
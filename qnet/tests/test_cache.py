@@ -0,0 +1,73 @@
+import random
+
+from qnet.cache import ResultCache, get_engine_version, get_source_digest, make_key
+
+
+def make_factory(scale):
+    return lambda **params: scale * params['value']
+
+
+def make_other_factory(offset):
+    return lambda **params: offset + params['value']
+
+
+def module_factory(**params):
+    return params
+
+
+first_lambda = lambda **params: params['value']  # noqa: E731
+second_lambda = lambda **params: -params['value']  # noqa: E731
+
+
+def test_lambda_factories_do_not_collide():
+    keys = {
+        make_key({'value': 1}, seed=0, settings={'factory': factory})
+        for factory in (make_factory(2), make_other_factory(2), make_factory(3))
+    }
+    assert len(keys) == 3
+
+
+def test_module_lambdas_do_not_collide():
+    first = make_key({'value': 1}, seed=0, settings={'factory': first_lambda})
+    assert first != make_key({'value': 1}, seed=0, settings={'factory': second_lambda})
+
+
+def test_same_closure_gives_same_key():
+    first = make_key({'value': 1}, seed=0, settings={'factory': make_factory(2)})
+    second = make_key({'value': 1}, seed=0, settings={'factory': make_factory(2)})
+    assert first == second
+
+
+def test_module_function_gives_stable_key():
+    first = make_key({'value': 1}, seed=0, settings={'factory': module_factory})
+    assert first == make_key({'value': 1}, seed=0, settings={'factory': module_factory})
+    assert first != make_key({'value': 1}, seed=1, settings={'factory': module_factory})
+
+
+def test_edited_module_function_changes_key():
+    namespace = {'__name__': __name__}
+    exec('def module_factory(**params):\n    return params', namespace)  # pylint: disable=exec-used
+    first = make_key({'value': 1}, seed=0, settings={'factory': namespace['module_factory']})
+    exec('def module_factory(**params):\n    return {**params, "scale": 2}', namespace)  # pylint: disable=exec-used
+    assert first != make_key({'value': 1}, seed=0, settings={'factory': namespace['module_factory']})
+
+
+def test_closure_over_objects_is_keyed_by_state():
+    keys = [
+        make_key({'value': 1}, seed=0, settings={'factory': make_factory(generator)})
+        for generator in (random.Random(1), random.Random(1), random.Random(2))
+    ]
+    assert keys[0] == keys[1] != keys[2]
+    assert make_key({'value': 1}, seed=0, settings={'factory': make_factory(lambda: 1)})
+
+
+def test_engine_version_includes_source_digest():
+    assert get_engine_version().endswith(get_source_digest())
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = make_key({'value': 1}, seed=0, settings={})
+    cache.put(key, {'metric': 1.5, 'name': 'ignored', 'flag': True})
+    assert cache.get(key) == {'metric': 1.5}
+    assert key in cache
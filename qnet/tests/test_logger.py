@@ -0,0 +1,32 @@
+from qnet.logger import BaseLogger
+from qnet.model import Verbosity
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec
+
+
+class LegacyLogger(BaseLogger):
+
+    def __init__(self):
+        self.num_states = 0
+
+    def nodes_states(self, time, nodes):
+        self.num_states += 1
+
+    def model_metrics(self, model_metrics):
+        pass
+
+    def nodes_metrics(self, nodes_metrics):
+        pass
+
+    def evaluation_reports(self, evaluation_reports):
+        pass
+
+
+def test_logger_without_deltas_runs_with_delta_verbosity():
+    spec = ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('constant', {'value': 1}), next_node='queue'),
+        NodeSpec(name='queue', type='queueing', delay=DistSpec('constant', {'value': 0.5})),
+    ))
+    model = ModelBuilder(logger_type=LegacyLogger).build(spec)
+    model.simulate(10, Verbosity.DELTA | Verbosity.STATE)
+    assert model.logger.num_states > 0
+    assert model.nodes['queue'].metrics.num_out == 9
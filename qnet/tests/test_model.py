@@ -0,0 +1,38 @@
+import random
+
+from qnet.model import Evaluation, Model, ModelMetrics, Verbosity
+from qnet.spec import DistSpec, ModelBuilder
+from qnet.steady import initialize_model
+
+from conftest import get_queue_spec
+
+
+def build_model():
+    return ModelBuilder().build(get_queue_spec(DistSpec('exponential', {'lambd': 2.0}), channels=1))
+
+
+def test_second_model_takes_over_releases():
+    random.seed(3)
+    first = build_model()
+    second = Model(first.nodes, logger=first.logger, metrics=ModelMetrics())
+    second.simulate(100, Verbosity.NONE)
+    assert first.metrics.num_processed == 0
+    assert second.metrics.num_processed == second.nodes['queue'].metrics.num_out
+
+
+def test_detached_model_stops_counting_releases():
+    random.seed(3)
+    model = build_model()
+    model.detach()
+    model.simulate(100, Verbosity.NONE)
+    assert model.nodes['queue'].metrics.num_out > 0
+    assert model.metrics.num_processed == 0
+
+
+def test_evaluation_reports_follow_initialization():
+    random.seed(3)
+    model = build_model()
+    model.evaluations.append(Evaluation('in_queue', lambda model: model.nodes['queue'].num_tasks))
+    assert model.evaluation_reports[0].result == 0
+    initialize_model(model, {'queue': [0.0, 1.0]}, source='factory')
+    assert model.evaluation_reports[0].result == 1
@@ -0,0 +1,69 @@
+import math
+import random
+import multiprocessing
+
+import pytest
+
+from qnet.model import Verbosity
+from qnet.parallel import simulate_parallel
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec, QueueSpec
+from qnet.stats import mean_confidence_interval
+
+PARTITIONS = [['factory', 'q0'], ['q1']]
+END_TIME = 500
+NUM_RUNS = 10
+
+
+def get_spec():
+    service = DistSpec('uniform', {'a': 0.5, 'b': 1.2})
+    return ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 1.0}), next_node='q0'),
+        NodeSpec(name='q0', type='queueing', delay=service, channels=1, next_node='q1'),
+        NodeSpec(name='q1', type='queueing', delay=service, channels=1),
+    ))
+
+
+def get_parallel_metrics(seed, start_method=None):
+    result = simulate_parallel(get_spec(), PARTITIONS, END_TIME, seed=seed, start_method=start_method)
+    nodes = {metrics.node_name: metrics for metrics in result.nodes_metrics}
+    return nodes['q1'].num_out, nodes['q0'].mean_wait_time
+
+
+def get_sequential_metrics(seed):
+    random.seed(seed)
+    model = ModelBuilder().build(get_spec())
+    model.simulate(END_TIME, Verbosity.NONE)
+    return model.nodes['q1'].metrics.num_out, model.nodes['q0'].metrics.mean_wait_time
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'forkserver'])
+def test_results_do_not_depend_on_start_method(start_method):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f'"{start_method}" start method is not available')
+    assert get_parallel_metrics(5, start_method) == get_parallel_metrics(5, 'spawn')
+
+
+def test_parallel_agrees_with_sequential_in_distribution():
+    parallel = [get_parallel_metrics(seed) for seed in range(NUM_RUNS)]
+    sequential = [get_sequential_metrics(seed) for seed in range(NUM_RUNS)]
+    for idx in range(2):
+        first = mean_confidence_interval([values[idx] for values in parallel], alpha=0.01)
+        second = mean_confidence_interval([values[idx] for values in sequential], alpha=0.01)
+        assert abs(first.mean - second.mean) <= math.hypot(first.half_width, second.half_width)
+
+
+def test_messages_at_window_end_arrive_before_local_events():
+    # Arrivals tie with service completions, and the factory comes first, so every tied arrival finds a busy channel
+    spec = ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('constant', {'value': 1.0}), next_node='queue'),
+        NodeSpec(name='queue',
+                 type='queueing',
+                 delay=DistSpec('constant', {'value': 1.0}),
+                 channels=1,
+                 queue=QueueSpec(maxlen=0)),
+    ))
+    model = ModelBuilder().build(spec)
+    model.simulate(10, Verbosity.NONE)
+    result = simulate_parallel(spec, [['factory'], ['queue']], 10)
+    assert result.nodes_metrics[1].num_failures == model.nodes['queue'].metrics.num_failures > 0
+    assert result.nodes_metrics[1].num_out == model.nodes['queue'].metrics.num_out
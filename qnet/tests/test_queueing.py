@@ -0,0 +1,142 @@
+import random
+import functools
+
+import pytest
+
+from qnet.common import Queue
+from qnet.dist import constant
+from qnet.model import Verbosity
+from qnet.queueing import ChannelPool, FIFOChannelPool, QueueingMetrics, QueueingNode
+from qnet.spec import DistSpec, InitialSpec, ModelBuilder
+
+from conftest import get_queue_spec
+
+
+UNIFORM = DistSpec('uniform', {'a': 0, 'b': 20})
+BATCH_QUEUE = {'service': DistSpec('exponential', {'lambd': 0.3}), 'arrival': DistSpec('exponential', {'lambd': 0.5}),
+               'channels': 2}
+
+
+def simulate(spec, end_time=2000, seed=3):
+    random.seed(seed)
+    model = ModelBuilder().build(spec)
+    model.simulate(end_time, Verbosity.NONE)
+    return model
+
+
+@pytest.mark.parametrize('channels', [None, 5])
+def test_aggregate_pool_matches_channel_pool(channels):
+    expected = simulate(get_queue_spec(UNIFORM, channels=channels)).nodes['queue'].metrics
+    actual = simulate(get_queue_spec(UNIFORM, node_type='aggregate_queueing', channels=channels)).nodes['queue'].metrics
+    for name in ('num_in', 'num_out', 'num_failures'):
+        assert getattr(actual, name) == getattr(expected, name)
+    for name in ('mean_wait_time', 'mean_channels_load', 'mean_load_time'):
+        assert getattr(actual, name) == pytest.approx(getattr(expected, name))
+
+
+@pytest.mark.parametrize('batch', [None, DistSpec('randint', {'a': 1, 'b': 4})])
+def test_aggregate_node_tracks_every_item(batch):
+    model = simulate(get_queue_spec(UNIFORM, node_type='infinite_server', batch=batch))
+    node = model.nodes['queue']
+    assert not set(node.tracked_items) & {task.item for task in node.channel_pool.tasks.data}
+    assert len(model.metrics.items) == model.nodes['factory'].metrics.num_out
+    assert len(list(model.metrics.processed_items)) == model.metrics.num_processed
+
+
+def test_aggregate_node_collects_requested_load():
+    spec = get_queue_spec(UNIFORM, node_type='aggregate_queueing', channels=5, collectors=('load', 'wait_time'))
+    model = simulate(spec)
+    expected = simulate(get_queue_spec(UNIFORM, node_type='aggregate_queueing', channels=5)).nodes['queue'].metrics
+    assert model.nodes['queue'].metrics.mean_channels_load == pytest.approx(expected.mean_channels_load)
+
+
+def test_aggregate_node_stamps_items_when_read():
+    model = simulate(get_queue_spec(UNIFORM, node_type='infinite_server'), end_time=100)
+    node = model.nodes['queue']
+    items = list(node.current_items)
+    assert items
+    assert all(item.current_time == node.current_time for item in items)
+
+
+def test_spec_disables_item_tracking():
+    model = simulate(get_queue_spec(UNIFORM, node_type='infinite_server', track_items=False))
+    assert not model.track_items
+    assert not model.metrics.items
+    assert model.metrics.num_processed > 0
+
+
+@pytest.mark.parametrize('pool_type', [ChannelPool, FIFOChannelPool])
+def test_direct_nodes_keep_their_pool(pool_type):
+    node = QueueingNode(queue=Queue(),
+                        channel_pool=pool_type(max_channels=1),
+                        delay_fn=functools.partial(constant, value=2),
+                        metrics=QueueingMetrics())
+    assert type(node.channel_pool) is pool_type
+
+
+@pytest.mark.parametrize('channels, delay, fifo_completion, pool_type', [
+    (3, DistSpec('constant', {'value': 2}), None, FIFOChannelPool),
+    (1, DistSpec('uniform', {'a': 0, 'b': 1}), None, FIFOChannelPool),
+    (3, DistSpec('uniform', {'a': 0, 'b': 1}), None, ChannelPool),
+    (3, DistSpec('uniform', {'a': 0, 'b': 1}), True, FIFOChannelPool),
+    (3, DistSpec('constant', {'value': 2}), False, ChannelPool),
+])
+def test_builder_detects_fifo_completion(channels, delay, fifo_completion, pool_type):
+    model = ModelBuilder().build(get_queue_spec(delay, channels=channels, fifo_completion=fifo_completion))
+    assert type(model.nodes['queue'].channel_pool) is pool_type
+
+
+def test_fifo_completion_rejects_other_pools():
+    with pytest.raises(ValueError):
+        ModelBuilder().build(get_queue_spec(UNIFORM, node_type='infinite_server', fifo_completion=True))
+
+
+def test_fifo_pool_matches_heap_pool():
+    initial = tuple(InitialSpec('queue', 'factory', next_time) for next_time in (9.0, 2.0, 5.0))
+    results = []
+    for fifo_completion in (None, False):
+        model = simulate(
+            get_queue_spec(DistSpec('constant', {'value': 10}),
+                           arrival=DistSpec('exponential', {'lambd': 0.25}),
+                           initial=initial,
+                           channels=3,
+                           fifo_completion=fifo_completion))
+        metrics = model.nodes['queue'].metrics
+        results.append((type(model.nodes['queue'].channel_pool), metrics.num_out, metrics.mean_wait_time))
+    assert results[0][0] is FIFOChannelPool and results[1][0] is ChannelPool
+    assert results[0][1:] == results[1][1:]
+
+
+def test_unit_batches_match_plain_model():
+    expected = simulate(get_queue_spec(**BATCH_QUEUE))
+    actual = simulate(
+        get_queue_spec(node_type='bulk_queueing',
+                       batch=DistSpec('constant', {'value': 1}),
+                       options={'max_batch': 1},
+                       **BATCH_QUEUE))
+    assert actual.metrics.num_events == expected.metrics.num_events
+    actual_metrics, expected_metrics = actual.nodes['queue'].metrics, expected.nodes['queue'].metrics
+    for name in ('num_in', 'num_out', 'mean_wait_time'):
+        assert getattr(actual_metrics, name) == getattr(expected_metrics, name)
+    # Loads are summed over a set of channels, so the summation order may change the last bits
+    assert actual_metrics.mean_channels_load == pytest.approx(expected_metrics.mean_channels_load)
+
+
+def test_bulk_service_accounts_per_item():
+    model = simulate(
+        get_queue_spec(node_type='bulk_queueing',
+                       batch=DistSpec('randint', {'a': 2, 'b': 6}),
+                       options={'max_batch': 5, 'min_batch': 3},
+                       **BATCH_QUEUE))
+    node = model.nodes['queue']
+    in_service = sum(len(task.batch) for task in node.channel_pool.tasks.data)
+    assert node.metrics.num_in == node.metrics.num_out + node.queuelen + in_service
+    assert node.metrics.wait_time_sketch.count == node.metrics.num_out + in_service
+    assert len(list(node.current_items)) == node.queuelen + in_service
+    assert all(3 <= len(task.batch) <= 5 for task in node.channel_pool.tasks.data)
+    assert model.metrics.num_events < model.nodes['factory'].metrics.num_out + node.metrics.num_out
+
+
+def test_bulk_batch_bounds_are_validated():
+    with pytest.raises(ValueError):
+        simulate(get_queue_spec(node_type='bulk_queueing', options={'max_batch': 2, 'min_batch': 3}, **BATCH_QUEUE))
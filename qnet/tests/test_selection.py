@@ -0,0 +1,26 @@
+from qnet.experiment import RunSettings
+from qnet.selection import select_best
+
+from conftest import build_queue_model
+
+SETTINGS = RunSettings(simulation_time=200)
+METRIC = 'queue__mean_wait_time'
+
+
+def test_identical_systems_terminate():
+    result = select_best(build_queue_model, {'channels': [1, 1, 1]}, SETTINGS, METRIC, indifference=0.1)
+    assert result.best_idx == 0
+    assert result.total_runs == 3 * 10
+    assert result.means[0] == result.means[1] == result.means[2]
+
+
+def test_close_systems_stop_at_max_runs():
+    result = select_best(build_queue_model, {'channels': [1, 1, 2]}, SETTINGS, METRIC, indifference=1e-6, max_runs=15)
+    assert max(result.num_runs) <= 15
+    assert result.best['channels'] == 2
+
+
+def test_best_system_is_selected_in_parallel():
+    result = select_best(build_queue_model, {'channels': [1, 2, 3]}, SETTINGS, METRIC, indifference=0.1, n_jobs=2)
+    assert result.best['channels'] in (2, 3)
+    assert result.eliminated_at[0] is not None
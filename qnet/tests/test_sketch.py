@@ -0,0 +1,52 @@
+import math
+import random
+
+from qnet.cache import to_metric_vector
+from qnet.shared import probe_metric_names
+from qnet.sketch import QuantileSketch
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec
+from qnet.stats import mean_confidence_interval
+from qnet.experiment import RunSettings, run_model
+
+
+def test_empty_sketch_reports_nan_quantiles():
+    sketch = QuantileSketch()
+    assert set(sketch.to_dict()) == {'p50', 'p95', 'p99'}
+    assert all(map(math.isnan, sketch.to_dict().values()))
+
+
+def test_confidence_interval_of_nan_quantiles_is_nan():
+    interval = mean_confidence_interval([math.nan, 1.0, 2.0])
+    assert math.isnan(interval.mean) and math.isnan(interval.half_width)
+
+
+def test_quantiles_within_relative_accuracy():
+    random.seed(0)
+    values = sorted(random.expovariate(1.0) for _ in range(10000))
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    for proba in (0.5, 0.95, 0.99):
+        exact = values[int(proba * (len(values) - 1))]
+        assert abs(sketch.quantile(proba) - exact) <= 0.02 * exact
+    assert set(sketch.to_dict()) == {'p50', 'p95', 'p99'}
+
+
+def test_merge_matches_single_sketch():
+    first, second, total = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for idx in range(1, 1001):
+        (first if idx % 2 else second).add(idx)
+        total.add(idx)
+    assert first.merge(second).to_dict() == total.to_dict()
+
+
+def test_probe_reports_every_run_metric():
+    spec = ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 1}), next_node='queue'),
+        NodeSpec(name='queue', type='queueing', delay=DistSpec('exponential', {'lambd': 2}), channels=1),
+    ))
+    names = probe_metric_names(lambda: ModelBuilder().build(spec), {})
+    random.seed(0)
+    metrics = to_metric_vector(run_model(ModelBuilder().build(spec), RunSettings(simulation_time=100)))
+    assert names == list(metrics)
+    assert {'model__time_in_system_p50', 'queue__sojourn_time_p50', 'queue__wait_time_p50'} <= set(names)
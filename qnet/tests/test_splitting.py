@@ -0,0 +1,46 @@
+import random
+
+from qnet.model import Verbosity
+from qnet.spec import DistSpec, ModelBuilder, QueueSpec
+from qnet.splitting import SplittingSettings, estimate_failure_proba
+
+from conftest import get_queue_spec
+
+ARRIVAL_RATE = 1.0
+SERVICE_RATE = 2.0
+CAPACITY = 5
+
+
+def build_model():
+    return ModelBuilder().build(
+        get_queue_spec(DistSpec('exponential', {'lambd': SERVICE_RATE}),
+                       arrival=DistSpec('exponential', {'lambd': ARRIVAL_RATE}),
+                       channels=1,
+                       queue=QueueSpec(maxlen=CAPACITY - 1)))
+
+
+def test_estimates_match_mm1k():
+    ratio = SERVICE_RATE / ARRIVAL_RATE
+    # A busy period starting with one item reaches the capacity before emptying as in the gambler's ruin
+    overflow_proba = (ratio - 1) / (ratio**CAPACITY - 1)
+    load = ARRIVAL_RATE / SERVICE_RATE
+    # Arrivals see the time-average state, so they are lost with the probability of the full system
+    failure_proba = (1 - load) * load**CAPACITY / (1 - load**(CAPACITY + 1))
+    result = estimate_failure_proba(build_model, {},
+                                    SplittingSettings(node='queue', crude_time=1000, effort=30),
+                                    num_runs=10,
+                                    alpha=0.01)
+    assert abs(result.overflow_proba.mean - overflow_proba) <= result.overflow_proba.half_width
+    assert abs(result.failure_proba.mean - failure_proba) <= result.failure_proba.half_width
+
+
+def test_clones_diverge():
+    random.seed(0)
+    model = build_model()
+    model.simulate(50, Verbosity.NONE)
+    first, second = model.clone(), model.clone()
+    first.simulate(100, Verbosity.NONE)
+    second.simulate(100, Verbosity.NONE)
+    assert model.current_time == 50
+    assert first.nodes['queue'].metrics.num_out > model.nodes['queue'].metrics.num_out
+    assert first.metrics.time_in_system_sum != second.metrics.time_in_system_sum
@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec, QueueSpec
+from qnet.steady import initialize_node, mmck_occupancy
+
+
+def get_mmck_occupancy(arrival_rate, service_rate, channels, capacity):
+    load = arrival_rate / service_rate
+
+    def get_weight(occupancy):
+        if occupancy <= channels:
+            return load**occupancy / math.factorial(occupancy)
+        return load**channels / math.factorial(channels) * (load / channels)**(occupancy - channels)
+
+    weights = [get_weight(occupancy) for occupancy in range(capacity + 1)]
+    return [weight / math.fsum(weights) for weight in weights]
+
+
+@pytest.mark.parametrize('channels, capacity', [(1, 1), (1, 10), (3, 3), (3, 12)])
+def test_bounded_occupancy_matches_closed_form(channels, capacity):
+    expected = get_mmck_occupancy(2.5, 1.0, channels, capacity)
+    assert mmck_occupancy(2.5, 1.0, channels, capacity) == pytest.approx(expected, rel=1e-12)
+
+
+def test_unbounded_occupancy_matches_mmc():
+    occupancy = mmck_occupancy(2.0, 1.0, 3)
+    load, utilization = 2.0, 2.0 / 3
+    tail_weight = load**3 / math.factorial(3) / (1 - utilization)
+    empty_proba = 1 / (math.fsum(load**idx / math.factorial(idx) for idx in range(3)) + tail_weight)
+    assert occupancy[0] == pytest.approx(empty_proba, rel=1e-9)
+    assert math.fsum(occupancy) == pytest.approx(1.0)
+
+
+def test_unstable_unbounded_queue_is_rejected():
+    with pytest.raises(ValueError, match='stable'):
+        mmck_occupancy(3.0, 1.0, 3)
+
+
+def test_occupancy_above_capacity_is_rejected():
+    model = ModelBuilder().build(ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 1.0}), next_node='queue'),
+        NodeSpec(name='queue',
+                 type='queueing',
+                 delay=DistSpec('exponential', {'lambd': 2.0}),
+                 channels=2,
+                 queue=QueueSpec(maxlen=3)),
+    )))
+    queue = model.nodes['queue']
+    with pytest.raises(ValueError, match='capacity'):
+        initialize_node(queue, model.nodes['factory'], occupancy=6)
+    assert queue.num_tasks == 0 and queue.queuelen == 0
+    initialize_node(queue, model.nodes['factory'], occupancy=5)
+    assert queue.num_tasks == 2 and queue.queuelen == 3
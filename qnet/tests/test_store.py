@@ -0,0 +1,107 @@
+import copy
+import random
+import functools
+
+import pytest
+
+from qnet.common import Queue
+from qnet.logger import CLILogger
+from qnet.model import Model, ModelMetrics, Nodes, Verbosity
+from qnet.node import NodeMetrics
+from qnet.queueing import ChannelPool, QueueingMetrics, QueueingNode
+from qnet.store import ItemStore, StoredFactoryNode
+
+np = pytest.importorskip('numpy')
+
+
+def test_column_survives_growth():
+    store = ItemStore(capacity=2)
+    items = [store.create(created_time=float(idx)) for idx in range(2)]
+    column = store.column('created_time')
+    items.extend(store.create(created_time=float(idx)) for idx in range(2, 5))
+    assert store.capacity >= 5
+    assert column.tolist() == [0.0, 1.0]
+    assert store.column('created_time')[:5].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_copy_gets_own_slot():
+    store = ItemStore(capacity=4)
+    item = store.create(created_time=1.0)
+    item_copy = copy.copy(item)
+    assert item_copy.handle != item.handle
+    item_copy.current_time = 5.0
+    assert item.current_time == 1.0
+    store.release(item_copy)
+    other = store.create(created_time=7.0)
+    assert item.created_time == 1.0
+    assert other.created_time == 7.0
+    assert item.id != other.id
+
+
+def test_deepcopy_with_shared_store_gets_own_slot():
+    store = ItemStore(capacity=4)
+    item = store.create(created_time=1.0)
+    item_copy = copy.deepcopy(item, {id(store): store})
+    assert item_copy.store is store and item_copy.handle != item.handle
+    store.release(item_copy)
+    store.create(created_time=7.0)
+    assert item.created_time == 1.0
+
+
+def test_deepcopy_copies_store():
+    store = ItemStore(capacity=4)
+    item = store.create(created_time=1.0)
+    item_copy = copy.deepcopy(item)
+    assert item_copy.store is not store
+    item_copy.created_time = 3.0
+    assert item.created_time == 1.0
+    assert item_copy.created_time == 3.0
+
+
+def test_freed_slots_are_reused():
+    store = ItemStore(capacity=2)
+    item = store.create(created_time=1.0)
+    handle = item.handle
+    store.release(item)
+    assert len(store) == 0
+    assert store.create(created_time=2.0).handle == handle
+
+
+def test_items_keep_only_their_slot():
+    store = ItemStore(capacity=2, history_len=3)
+    item = store.create(created_time=1.0)
+    assert not hasattr(item, '__dict__')
+    item.history.extend(range(5))
+    assert list(store.histories[item.handle]) == [2, 3, 4]
+    assert list(copy.copy(item).history) == [2, 3, 4]
+
+
+def build_model(store, track_items=False):
+    queue = QueueingNode(name='queue',
+                         queue=Queue(),
+                         metrics=QueueingMetrics(),
+                         channel_pool=ChannelPool(max_channels=1),
+                         delay_fn=functools.partial(random.expovariate, 2.0))
+    factory = StoredFactoryNode(store=store,
+                                name='factory',
+                                metrics=NodeMetrics(),
+                                delay_fn=functools.partial(random.expovariate, 1.0),
+                                next_node=queue)
+    return Model(Nodes.from_node_tree_root(factory), logger=CLILogger(), metrics=ModelMetrics(), track_items=track_items)
+
+
+def test_released_items_free_their_slots():
+    random.seed(3)
+    store = ItemStore(capacity=64)
+    model = build_model(store)
+    store.attach(model)
+    model.simulate(1000, Verbosity.NONE)
+    queue = model.nodes['queue']
+    assert model.metrics.num_processed > 500
+    assert len(store) == queue.queuelen + queue.num_tasks
+    assert store.capacity == 64
+
+
+def test_tracking_models_keep_their_slots():
+    with pytest.raises(ValueError, match='tracked'):
+        ItemStore().attach(build_model(ItemStore(), track_items=True))
@@ -0,0 +1,30 @@
+import json
+
+from qnet.experiment import RunSettings, get_run_key
+from qnet.sweep import NUM_RUNS_COLUMN, sweep
+
+from conftest import build_queue_model
+
+SETTINGS = RunSettings(simulation_time=50)
+
+
+def build_model(channels=1, num_runs=None):
+    return build_queue_model(channels)
+
+
+def test_run_counts_do_not_overwrite_params():
+    table = sweep(build_model, {'channels': [1, 2], 'num_runs': ['a']}, SETTINGS, num_runs=3)
+    assert table.columns['num_runs'] == ['a', 'a']
+    assert table.columns[NUM_RUNS_COLUMN] == [3, 3]
+    assert table.num_rows == 2
+
+
+def test_tasks_run_longest_first(tmp_path):
+    checkpoint = tmp_path.joinpath('sweep.jsonl')
+    sweep(build_model, {'channels': [1, 2, 3]},
+          SETTINGS,
+          num_runs=1,
+          cost_fn=lambda params: params['channels'],
+          checkpoint=checkpoint)
+    keys = [json.loads(line)['key'] for line in checkpoint.read_text().splitlines()]
+    assert keys == [get_run_key(build_model, {'channels': channels}, SETTINGS, 0) for channels in (3, 2, 1)]
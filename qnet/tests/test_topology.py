@@ -0,0 +1,60 @@
+import sys
+
+import pytest
+
+from qnet.model import Nodes, Verbosity
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec, RouteSpec
+
+
+def build_nodes():
+    nodes = (
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 1.0}), next_node='split'),
+        NodeSpec(name='split', type='proba_transition', routes=(RouteSpec('first', 0.5), RouteSpec('second'))),
+        NodeSpec(name='first', type='queueing', delay=DistSpec('exponential', {'lambd': 2.0}), next_node='merge'),
+        NodeSpec(name='second', type='queueing', delay=DistSpec('exponential', {'lambd': 2.0}), next_node='merge'),
+        NodeSpec(name='merge', type='queueing', delay=DistSpec('exponential', {'lambd': 3.0})),
+    )
+    return ModelBuilder().build(ModelSpec(nodes=nodes)).nodes
+
+
+def test_adjacency_holds_successors_only():
+    nodes = build_nodes()
+    topology = nodes.compile()
+    successors = {name: {topology.names[idx] for idx in topology.adjacency[topology.index(name)]} for name in nodes}
+    assert successors == {
+        'factory': {'split'},
+        'split': {'first', 'second'},
+        'first': {'merge'},
+        'second': {'merge'},
+        'merge': set(),
+    }
+
+
+def test_discovery_follows_connected_nodes_depth_first():
+    nodes = build_nodes()
+    assert list(Nodes.from_node_tree_root(nodes['factory'])) == ['factory', 'split', 'first', 'merge', 'second']
+
+
+def build_loop():
+    return ModelBuilder().build(ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 1.0}), next_node='a'),
+        NodeSpec(name='a', type='proba_transition', routes=(RouteSpec('b', 0.999), RouteSpec(None))),
+        NodeSpec(name='b', type='proba_transition', routes=(RouteSpec('a'), )),
+    )))
+
+
+def test_zero_delay_cycles_are_rejected():
+    with pytest.raises(ValueError, match='a -> b -> a'):
+        build_loop()
+
+
+def test_long_zero_delay_chain_does_not_recurse():
+    num_links = 2 * sys.getrecursionlimit()
+    names = [f'link{idx}' for idx in range(num_links)]
+    model = ModelBuilder().build(ModelSpec(nodes=(
+        NodeSpec(name='factory', type='factory', delay=DistSpec('constant', {'value': 1.0}), next_node=names[0]),
+        *(NodeSpec(name=name, type='proba_transition', routes=(RouteSpec(next_name), ))
+          for name, next_name in zip(names, names[1:] + [None])),
+    )))
+    model.simulate(3, Verbosity.NONE)
+    assert model.metrics.num_processed == 3
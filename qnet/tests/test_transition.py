@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from qnet.model import Verbosity
+from qnet.spec import DistSpec, ModelBuilder, ModelSpec, NodeSpec
+
+TARGETS = ('t0', 't1', 't2')
+
+
+def build_model(min_jockey_diff):
+    nodes = (
+        NodeSpec(name='factory', type='factory', delay=DistSpec('exponential', {'lambd': 2.7}), next_node='router'),
+        NodeSpec(name='router',
+                 type='shortest_queue',
+                 links={'targets': TARGETS},
+                 options={'min_jockey_diff': min_jockey_diff}),
+        *(NodeSpec(name=name, type='queueing', delay=DistSpec('exponential', {'lambd': 1.0}), channels=1)
+          for name in TARGETS),
+    )
+    return ModelBuilder().build(ModelSpec(nodes=nodes))
+
+
+@pytest.mark.parametrize('min_jockey_diff', [None, 1, 2])
+def test_jockeying_keeps_node_counts_consistent(min_jockey_diff):
+    random.seed(5)
+    model = build_model(min_jockey_diff)
+    model.simulate(2000, Verbosity.NONE)
+    for name in TARGETS:
+        node = model.nodes[name]
+        assert node.metrics.num_in == node.metrics.num_out + node.queuelen + node.num_tasks
+        assert node.metrics.sojourn_time_sketch.count == node.metrics.num_out
+    router = model.nodes['router']
+    assert (router.num_jockeys > 0) == (min_jockey_diff is not None)
+    # Jockeyed items leave their donors too, so they are counted out twice
+    num_out = sum(model.nodes[name].metrics.num_out for name in TARGETS) - router.num_jockeys
+    in_system = sum(model.nodes[name].queuelen + model.nodes[name].num_tasks for name in TARGETS)
+    assert model.nodes['factory'].metrics.num_out == num_out + in_system
+
+
+def test_jockeying_balances_queues():
+    random.seed(5)
+    model = build_model(1)
+    for _ in range(5000):
+        model.step()
+        queuelens = [model.nodes[name].queuelen for name in TARGETS]
+        assert max(queuelens) - min(queuelens) <= 1
+
+
+@pytest.mark.parametrize('min_jockey_diff', [0, -1])
+def test_jockeying_requires_positive_difference(min_jockey_diff):
+    with pytest.raises(ValueError):
+        build_model(min_jockey_diff)
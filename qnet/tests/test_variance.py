@@ -0,0 +1,66 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from qnet.experiment import RunSettings, run_model, run_replication
+from qnet.cache import to_metric_vector
+from qnet.spec import DistSpec, ModelBuilder
+from qnet.stats import mean_confidence_interval, t_quantile
+from qnet.variance import antithetic, average_metric_vectors, controlled_confidence_interval
+
+from conftest import get_queue_spec
+
+SETTINGS = RunSettings(simulation_time=200)
+
+
+def build_model():
+    return ModelBuilder().build(get_queue_spec(DistSpec('exponential', {'lambd': 1.5}), channels=1))
+
+
+def test_antithetic_complements_uniforms_only():
+    random.seed(7)
+    plain = [random.random() for _ in range(3)], random.randint(1, 100)
+    random.seed(7)
+    with antithetic():
+        complemented = [random.random() for _ in range(3)], random.randint(1, 100)
+    assert complemented[0] == [1.0 - value for value in plain[0]]
+    assert complemented[1] == plain[1]
+
+
+def test_antithetic_replication_averages_the_pair():
+    random.seed(4)
+    first = to_metric_vector(run_model(build_model(), SETTINGS))
+    random.seed(4)
+    with antithetic():
+        second = to_metric_vector(run_model(build_model(), SETTINGS))
+    metrics = run_replication(build_model, {}, RunSettings(simulation_time=200, antithetic=True), seed=4)
+    assert metrics == pytest.approx(average_metric_vectors(first, second), nan_ok=True)
+    assert first['queue__num_out'] != second['queue__num_out']
+
+
+def test_controlled_interval_matches_simple_regression():
+    rng = random.Random(1)
+    controls = [rng.gauss(5.0, 1.0) for _ in range(20)]
+    values = [2.0 + 3.0 * (control - 5.0) + rng.gauss(0.0, 0.5) for control in controls]
+    interval = controlled_confidence_interval(values, [controls], [5.0], alpha=0.05)
+
+    num_values = len(values)
+    mean_control, mean_value = statistics.fmean(controls), statistics.fmean(values)
+    sxx = math.fsum((control - mean_control)**2 for control in controls)
+    slope = math.fsum((control - mean_control) * (value - mean_value)
+                      for control, value in zip(controls, values)) / sxx
+    intercept = mean_value - slope * (mean_control - 5.0)
+    residuals = [value - mean_value - slope * (control - mean_control) for control, value in zip(controls, values)]
+    # One degree of freedom goes to the intercept and one to the control
+    std_error = math.sqrt(math.fsum(residual**2 for residual in residuals) / (num_values - 2) *
+                          (1 / num_values + (mean_control - 5.0)**2 / sxx))
+    assert math.isclose(interval.mean, intercept, rel_tol=1e-9)
+    assert math.isclose(interval.half_width, t_quantile(0.975, num_values - 2) * std_error, rel_tol=1e-9)
+    assert interval.half_width < mean_confidence_interval(values).half_width
+
+
+def test_controlled_interval_needs_degrees_of_freedom():
+    values, controls = [1.0, 2.0], [[0.5, 1.5]]
+    assert controlled_confidence_interval(values, controls, [1.0]) == mean_confidence_interval(values)
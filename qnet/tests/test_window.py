@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+from qnet.model import Verbosity
+from qnet.spec import DistSpec, ModelBuilder
+
+from conftest import get_queue_spec
+
+
+def get_spec(window):
+    return get_queue_spec(DistSpec('exponential', {'lambd': 2.0}), channels=1, collectors=('window', ), window=window)
+
+
+def test_window_collector_fills_window():
+    random.seed(3)
+    model = ModelBuilder().build(get_spec(window=50))
+    model.simulate(200, Verbosity.NONE)
+    assert 'window_mean_queuelen' in model.nodes['queue'].metrics.to_dict()
+
+
+def test_window_collector_requires_window():
+    with pytest.raises(ValueError, match='window'):
+        ModelBuilder().build(get_spec(window=None))